@@ -0,0 +1,3518 @@
+"""Barcode PDF generation library and headless command line interface.
+
+Importing this module does not pull in Tkinter, PIL or NumPy; they are loaded
+only by the code paths that need them. Run ``python barcode_gen.py --help``
+for the command line options.
+"""
+
+import os
+import sys
+import functools
+import multiprocessing
+import tempfile
+import shutil
+import random
+import sqlite3
+import hashlib
+import itertools
+import string
+import argparse
+import csv
+import json
+import math
+import time
+import threading
+import contextlib
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A3, A4, A5, LEGAL, LETTER
+from reportlab.lib.units import inch, mm
+from reportlab.pdfbase.pdfmetrics import getDescent, stringWidth
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfbase.pdfutils import asciiBase85Encode
+from reportlab import rl_config
+
+from symbologies import (
+    CHECK_SCHEMES,
+    MOD43_CHARSET,
+    SYMBOLOGIES,
+    check_character,
+    check_weight,
+    code128_values,
+    encode_symbol,
+)
+
+
+# Where the font found for raster barcode text is remembered between runs,
+# so later processes (including pool workers) skip probing the disk
+FONT_CACHE_FILE = os.path.join(tempfile.gettempdir(), "barcode_gen_font.json")
+
+
+def _font_candidates() -> list:
+    return [
+        os.path.join(os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else __file__), "arial.ttf"),
+        "C:\\Windows\\Fonts\\arial.ttf",
+        "C:\\Windows\\Fonts\\Arial.ttf",
+        "C:\\Windows\\Fonts\\DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Linux
+        "/System/Library/Fonts/Helvetica.ttc",  # macOS
+    ]
+
+
+def resolve_font_path(cache_file=FONT_CACHE_FILE):
+    """
+    Find the font for raster barcode text, using the persisted answer when valid.
+    
+    The cached path is trusted while the font still exists and the candidate
+    list is unchanged; otherwise the candidates are probed again and the
+    result is saved for the next run.
+    
+    Returns:
+        Font file path, or None to keep python-barcode's bundled font
+    """
+    candidates = _font_candidates()
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["candidates"] == candidates and os.path.exists(cached["font_path"]):
+            return cached["font_path"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    font_path = next((path for path in candidates if os.path.exists(path)), None)
+    if font_path:
+        try:
+            part_path = f"{cache_file}.{os.getpid()}"
+            with open(part_path, "w", encoding="utf-8") as f:
+                json.dump({"candidates": candidates, "font_path": font_path}, f)
+            os.replace(part_path, cache_file)
+        except OSError:
+            pass
+    return font_path
+
+
+@functools.lru_cache(maxsize=None)
+def fix_barcode_font():
+    """Force python-barcode to use a known system font (resolved once per process)."""
+    from barcode.writer import ImageWriter
+
+    font_path = resolve_font_path()
+    if font_path:
+        ImageWriter.font_path = font_path
+    return ImageWriter.font_path
+
+
+@functools.lru_cache(maxsize=None)
+def _truetype(path, size):
+    from PIL import ImageFont
+
+    return ImageFont.truetype(path, size)
+
+
+@functools.lru_cache(maxsize=None)
+def _font_caching_writer_class():
+    """ImageWriter subclass that loads each font size once instead of once per barcode."""
+    from barcode.writer import ImageWriter, mm2px, pt2mm
+
+    class FontCachingImageWriter(ImageWriter):
+        # Same drawing as ImageWriter._paint_text, with the font from _truetype()
+        def _paint_text(self, xpos, ypos):
+            barcodetext = self.human if self.human != "" else self.text
+            font_size = int(mm2px(pt2mm(self.font_size), self.dpi))
+            if font_size <= 0:
+                return
+            font = _truetype(self.font_path, font_size)
+            for subtext in barcodetext.split("\n"):
+                pos = (mm2px(xpos, self.dpi), mm2px(ypos, self.dpi))
+                self._draw.text(pos, subtext, font=font, fill=self.foreground, anchor="md")
+                ypos += pt2mm(self.font_size) / 2 + self.text_line_distance
+
+    return FontCachingImageWriter
+
+
+@functools.lru_cache(maxsize=None)
+def _code128_class():
+    """python-barcode's Code128 with the symbols chosen by symbologies.code128_values()."""
+    from barcode import Code128
+
+    class OptimalCode128(Code128):
+        # Same bars as the vector path; build() appends the check symbol
+        def _build(self):
+            return code128_values(self.code)[:-1]
+
+    return OptimalCode128
+
+
+# Writers hold the image being drawn, so each thread gets its own
+_writers = threading.local()
+
+
+def barcode_writer(mode="RGB"):
+    """
+    Return this thread's reusable ImageWriter for an image mode.
+    
+    The font is resolved and loaded once, then shared by every barcode the
+    thread renders. Render with options from writer_options() so nothing
+    carries over from the previous code.
+    """
+    writers = getattr(_writers, "by_mode", None)
+    if writers is None:
+        writers = _writers.by_mode = {}
+    if mode not in writers:
+        fix_barcode_font()
+        writers[mode] = _font_caching_writer_class()(mode=mode)
+    return writers[mode]
+
+
+@functools.lru_cache(maxsize=64)
+def writer_options(module_width=0.2, module_height=15.0, quiet_zone=6.5, write_text=True) -> dict:
+    """Options for Barcode.render()/save(); shared, so treat the dict as read-only."""
+    return {
+        'write_text': write_text,
+        'module_height': module_height,
+        'module_width': module_width,
+        'quiet_zone': quiet_zone,
+        # A reused writer would otherwise keep the previous code's text
+        'text': "",
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """Import NumPy on first use; it is optional and only speeds up bulk generation."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# Character sets of the random generation modes
+CHARSETS = {
+    "random_digits": string.digits,
+    "random_alphanumeric": string.ascii_uppercase + string.digits,
+    # Full ASCII printable characters (excluding space for readability)
+    "random_full": string.ascii_letters + string.digits + string.punctuation.replace(' ', ''),
+}
+
+
+def index_to_code(index: int, charset: str, length: int) -> str:
+    """Map an integer in [0, len(charset)**length) to its fixed-length code."""
+    if charset == string.digits:
+        return str(index).zfill(length)
+    base = len(charset)
+    chars = []
+    for _ in range(length):
+        index, digit = divmod(index, base)
+        chars.append(charset[digit])
+    return ''.join(reversed(chars))
+
+
+def indices_to_codes(indices, charset: str, length: int) -> list:
+    """Map many keyspace indices to codes, vectorized with NumPy when available."""
+    base = len(charset)
+    np = _numpy()
+    if np is None or base ** length > np.iinfo(np.int64).max:
+        return [index_to_code(i, charset, length) for i in indices]
+
+    values = np.asarray(indices, dtype=np.int64)
+    digits = np.empty((len(values), length), dtype=np.uint8)
+    for pos in range(length - 1, -1, -1):
+        values, digits[:, pos] = np.divmod(values, base)
+    table = np.frombuffer(charset.encode("ascii"), dtype=np.uint8)
+    return table[digits].view(f"S{length}").ravel().astype(f"U{length}").tolist()
+
+
+def sample_indices(keyspace: int, count: int) -> list:
+    """Draw count distinct integers from range(keyspace) in O(count) time."""
+    if keyspace <= sys.maxsize:
+        return random.sample(range(keyspace), count)
+
+    # range() beyond sys.maxsize has no len(), but such keyspaces dwarf any
+    # feasible count so rejection sampling practically never collides
+    seen = set()
+    while len(seen) < count:
+        seen.add(random.randrange(keyspace))
+    return list(seen)
+
+
+class KeyedPermutation:
+    """
+    Seed-keyed bijection on range(size).
+    
+    A balanced Feistel network permutes the smallest even-bit domain covering
+    size; values falling outside range(size) are re-encrypted (cycle walking),
+    which averages fewer than four passes.
+    """
+
+    ROUNDS = 6
+
+    def __init__(self, size: int, key: bytes):
+        if size < 1:
+            raise ValueError("Permutation size must be positive")
+        self.size = size
+        self.half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        self._nbytes = (self.half_bits + 7) // 8
+        self._round_keys = [
+            hashlib.blake2b(key, digest_size=16, person=b"round%d" % i).digest()
+            for i in range(self.ROUNDS)
+        ]
+
+    def _round(self, value: int, round_key: bytes) -> int:
+        digest = hashlib.blake2b(value.to_bytes(self._nbytes, "little"), key=round_key, digest_size=self._nbytes).digest()
+        return int.from_bytes(digest, "little") & self.mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.mask
+        for round_key in self._round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << self.half_bits) | right
+
+    def __call__(self, index: int) -> int:
+        if not 0 <= index < self.size:
+            raise IndexError(f"Index {index} outside permutation of size {self.size}")
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+# Codes computed per batch when sequential codes are streamed
+SEQUENTIAL_CHUNK = 10000
+
+
+class SequentialCodes:
+    """
+    Numeric codes counting up from start: prefix + number + suffix [+ check].
+    
+    The number is zero-padded to length digits. Code i is computed directly
+    from i, so any range [i, j) can be produced on its own, e.g. one range per
+    worker. Ranges that would need more than length digits raise ValueError
+    instead of silently producing longer codes.
+    
+    array() is the fast path: with NumPy, 10M codes come back as a bytes array
+    in about half a second. codes() builds the same range as Python strings,
+    which costs several times that (about 1.5-2 s for 10M); use it only where
+    str objects are needed.
+    
+    Args:
+        start: First number (int or digit string)
+        length: Digits of the number part
+        prefix: Text before the number
+        suffix: Text after the number
+        check: None or a check_character() scheme, computed over the whole code
+    """
+
+    def __init__(self, start=1, length=11, prefix="", suffix="", check=None):
+        self.first = int(start)
+        self.length = length
+        self.prefix = prefix
+        self.suffix = suffix
+        self.check = check
+        if self.first < 0 or self.first >= 10 ** length:
+            raise ValueError(f"Start code {start} does not fit in {length} digits")
+        if check is not None:
+            # Validates the scheme and the prefix/suffix characters up front
+            check_character(prefix + "0" * length + suffix, check)
+
+    def __len__(self):
+        """Number of codes before the number part overflows."""
+        return 10 ** self.length - self.first
+
+    def _check_range(self, start: int, stop: int):
+        if not 0 <= start <= stop:
+            raise ValueError(f"Invalid range [{start}, {stop})")
+        if stop > len(self):
+            raise ValueError(
+                f"Sequential codes overflow {self.length} digits: "
+                f"{stop} codes from {self.first} would pass {10 ** self.length - 1}"
+            )
+
+    def code(self, i: int) -> str:
+        self._check_range(i, i + 1)
+        payload = f"{self.prefix}{str(self.first + i).zfill(self.length)}{self.suffix}"
+        return payload + check_character(payload, self.check) if self.check else payload
+
+    def _digits(self, values, width: int, last_col: int, payload_width: int):
+        """Digit characters of values as columns ending at last_col, with their check sums."""
+        np = _numpy()
+        chars = np.empty((len(values), width), dtype=np.uint8)
+        total = np.zeros(len(values), dtype=np.int64)
+        for k in range(width - 1, -1, -1):
+            values, digit = np.divmod(values, 10)
+            chars[:, k] = digit + 48
+            if self.check:
+                total += check_weight(digit, payload_width - 1 - last_col + (width - 1 - k), self.check)
+        return chars, total
+
+    def _matrix(self, start: int, stop: int, pad: int = 0):
+        """Codes start..stop-1 as rows of ASCII bytes, plus pad spare columns."""
+        self._check_range(start, stop)
+        np = _numpy()
+        head = len(self.prefix)
+        tail = head + self.length
+        payload_width = tail + len(self.suffix)
+        count = stop - start
+
+        out = np.empty((count, payload_width + (1 if self.check else 0) + pad), dtype=np.uint8)
+        if not count:
+            return out
+        out[:, :head] = np.frombuffer(self.prefix.encode("ascii"), dtype=np.uint8)
+        out[:, tail:payload_width] = np.frombuffer(self.suffix.encode("ascii"), dtype=np.uint8)
+
+        # The low digits cycle through a table of all low-digit numbers and the
+        # high digits change once per cycle, so only small tables are computed
+        # digit by digit; the bulk of the work is copying rows
+        low = min(self.length, 4)
+        block = 10 ** low
+        first = self.first + start
+        last = self.first + stop - 1
+
+        low_chars, low_total = self._digits(np.arange(block, dtype=np.int64), low, tail - 1, payload_width)
+        index = np.arange(first % block, first % block + count, dtype=np.int64) % block
+        out[:, tail - low:tail] = low_chars.view(f"S{low}").ravel()[index].view(np.uint8).reshape(count, low)
+
+        high_values = np.arange(first // block, last // block + 1, dtype=np.int64)
+        counts = np.full(len(high_values), block, dtype=np.int64)
+        counts[0] -= first % block
+        counts[-1] -= block - 1 - last % block
+        high_chars, high_total = self._digits(high_values, self.length - low, tail - low - 1, payload_width)
+        out[:, head:tail - low] = np.repeat(high_chars, counts, axis=0)
+
+        if self.check:
+            # Prefix and suffix add the same amount to every code's sum
+            total = np.repeat(high_total, counts) + low_total[index]
+            fixed = itertools.chain(enumerate(self.prefix), enumerate(self.suffix, tail))
+            for col, ch in fixed:
+                value = MOD43_CHARSET.index(ch) if self.check == "mod43" else int(ch)
+                total += check_weight(value, payload_width - 1 - col, self.check)
+            if self.check == "mod43":
+                out[:, payload_width] = np.frombuffer(MOD43_CHARSET.encode("ascii"), dtype=np.uint8)[total % 43]
+            else:
+                out[:, payload_width] = 48 + (-total % 10)
+        return out
+
+    def array(self, start: int, stop: int):
+        """Codes start..stop-1 as a NumPy bytes array (requires NumPy, length <= 18)."""
+        rows = self._matrix(start, stop)
+        return rows.view(f"S{rows.shape[1]}").ravel()
+
+    def codes(self, start: int, stop: int) -> list:
+        """
+        Codes start..stop-1 as a list of strings.
+        
+        With NumPy the digits are built by _matrix() like array(), but creating
+        one str per code dominates the cost; prefer array() for large ranges.
+        """
+        frame = self.prefix + self.suffix
+        if _numpy() is None or self.length > 18 or not frame.isascii() or "\n" in frame:
+            self._check_range(start, stop)
+            return [self.code(i) for i in range(start, stop)]
+        # One decode and split creates the strings far faster than per-item conversion
+        rows = self._matrix(start, stop, pad=1)
+        rows[:, -1] = ord("\n")
+        codes = rows.tobytes().decode("ascii").split("\n")
+        codes.pop()
+        return codes
+
+
+def sequential_codes(start_code=None, length=11, prefix="", suffix="", check=None) -> SequentialCodes:
+    """SequentialCodes for a user-entered start code; empty or non-numeric starts at 1."""
+    if start_code is None or not start_code.isdigit():
+        start_code = 1
+    return SequentialCodes(start_code, length, prefix, suffix, check)
+
+
+def seeded_code_stream(
+    seed,
+    mode: str = "random_digits",
+    length: int = 11,
+    start: int = 0,
+    stop: int = None,
+    start_code: str = None,
+    prefix: str = "",
+    suffix: str = "",
+    check: str = None,
+):
+    """
+    Yield the codes with indices start..stop-1 of a deterministic unique stream.
+    
+    Code i is a pure function of (seed, mode, length, i): random modes map i
+    through a KeyedPermutation of the keyspace, sequential mode counts up from
+    start_code. Any sub-range can therefore be generated independently, e.g.
+    to resume a job after its last completed page or to split it across
+    workers, without ever repeating a code.
+    
+    Args:
+        seed: Any value whose str() identifies the stream
+        mode: Generation mode, as in generate_unique_barcodes
+        length: Length of generated codes
+        start: Index of the first code to yield
+        stop: Index after the last code, defaults to the end of the keyspace
+        start_code: Starting code for sequential mode
+        prefix, suffix, check: Framing of sequential codes, see SequentialCodes
+    """
+    if mode == "sequential":
+        sequence = sequential_codes(start_code, length, prefix, suffix, check)
+        stop = len(sequence) if stop is None else stop
+        for chunk_start in range(start, stop, SEQUENTIAL_CHUNK):
+            yield from sequence.codes(chunk_start, min(stop, chunk_start + SEQUENTIAL_CHUNK))
+        return
+
+    if mode not in CHARSETS:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    charset = CHARSETS[mode]
+    keyspace = len(charset) ** length
+    stop = keyspace if stop is None else stop
+    if not 0 <= start <= stop <= keyspace:
+        raise ValueError(
+            f"Range [{start}, {stop}) is outside the {keyspace} codes of length {length} for mode {mode}"
+        )
+
+    key = hashlib.sha256(f"{seed}:{mode}:{length}".encode("utf-8")).digest()
+    permute = KeyedPermutation(keyspace, key)
+    for i in range(start, stop):
+        yield index_to_code(permute(i), charset, length)
+
+
+class CodeRegistry:
+    """
+    On-disk record of every code already issued, shared across runs.
+    
+    Codes live in a SQLite table keyed by the code itself. Membership is
+    checked in bulk by loading a batch into a temporary table and joining,
+    so a page's worth of codes costs one round-trip, not one per code.
+    """
+
+    def __init__(self, path="issued_codes.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS issued (code TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.conn.execute("CREATE TEMP TABLE probe (code TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM issued").fetchone()[0]
+
+    def __contains__(self, code):
+        return self.conn.execute("SELECT 1 FROM issued WHERE code = ?", (code,)).fetchone() is not None
+
+    def close(self):
+        self.conn.close()
+
+    def issued_among(self, codes) -> set:
+        """Return the subset of codes that were already issued."""
+        with self.conn:
+            self.conn.execute("DELETE FROM probe")
+            self.conn.executemany("INSERT OR IGNORE INTO probe VALUES (?)", ((c,) for c in codes))
+            rows = self.conn.execute("SELECT code FROM probe JOIN issued USING (code)").fetchall()
+        return {row[0] for row in rows}
+
+    def add_many(self, codes):
+        """Record codes as issued; codes already present are ignored."""
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO issued VALUES (?)", ((c,) for c in codes))
+
+    def take_unissued(self, candidates, count: int, batch_size: int = 10000) -> list:
+        """
+        Collect the first count distinct, not yet issued codes from candidates.
+        
+        Raises:
+            ValueError: If candidates run out first
+        """
+        codes = []
+        seen = set()
+        it = iter(candidates)
+        while len(codes) < count:
+            batch = [
+                c for c in dict.fromkeys(itertools.islice(it, max(batch_size, count - len(codes))))
+                if c not in seen
+            ]
+            if not batch:
+                raise ValueError(f"Only {len(codes)} of {count} requested codes are still unissued")
+            seen.update(batch)
+            issued = self.issued_among(batch)
+            codes.extend(c for c in batch if c not in issued)
+        return codes[:count]
+
+
+# How many fresh random draws to try before deciding the keyspace is used up
+ISSUE_ATTEMPTS = 20
+
+
+def generate_unique_barcodes(
+    count: int,
+    mode: str = "random_digits",
+    start_code: str = None,
+    length: int = 11,
+    seed=None,
+    offset: int = 0,
+    registry: "CodeRegistry" = None,
+    prefix: str = "",
+    suffix: str = "",
+    check: str = None,
+) -> list:
+    """
+    Generate a list of unique Code128 barcodes.
+    
+    Random modes sample distinct indices from the keyspace of all codes of the
+    given length, so the run time is linear in count. With a seed the codes
+    come from seeded_code_stream() instead and are reproducible.
+    
+    Args:
+        count: Number of barcodes to generate
+        mode: Generation mode - "random_digits", "random_alphanumeric", "random_full", "sequential"
+        start_code: Starting code for sequential mode
+        length: Length of generated codes
+        seed: Make random modes deterministic and resumable
+        offset: Index of the first code in the seeded stream or sequence (to resume a job)
+        registry: Skip codes already recorded in this CodeRegistry
+        prefix: Text before the number of sequential codes
+        suffix: Text after the number of sequential codes
+        check: Check character scheme of sequential codes ("mod10", "gs1", "mod43")
+    
+    Returns:
+        List of barcode codes as strings
+    
+    Raises:
+        ValueError: If the mode is unknown, count exceeds the number of possible
+            codes or sequential codes would overflow length digits
+    """
+    if mode != "sequential" and (prefix or suffix or check):
+        raise ValueError("Prefix, suffix and check digits are only supported in sequential mode")
+
+    if registry is not None:
+        if seed is not None or mode == "sequential":
+            # Issued codes are skipped, so keep reading the stream past offset + count
+            candidates = seeded_code_stream(seed, mode, length, offset, None, start_code, prefix, suffix, check)
+        else:
+            candidates = itertools.chain.from_iterable(
+                generate_unique_barcodes(count, mode, start_code, length) for _ in range(ISSUE_ATTEMPTS)
+            )
+        return registry.take_unissued(candidates, count)
+
+    if mode == "sequential":
+        return sequential_codes(start_code, length, prefix, suffix, check).codes(offset, offset + count)
+
+    if seed is not None:
+        return list(seeded_code_stream(seed, mode, length, offset, offset + count, start_code))
+
+    if mode in CHARSETS:
+        charset = CHARSETS[mode]
+        keyspace = len(charset) ** length
+        if count > keyspace:
+            raise ValueError(
+                f"Cannot generate {count} unique codes: only {keyspace} codes of length {length} exist for mode {mode}"
+            )
+        return indices_to_codes(sample_indices(keyspace, count), charset, length)
+    
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+
+def generate_barcode(
+    code: str,
+    output_dir,
+    module_width=0.2,
+    module_height=15.0,
+    quiet_zone=6.5,
+    write_text=True,
+    name=None,
+):
+    """Generate a single barcode image and return its path.
+    
+    Args:
+        code: Barcode code string
+        output_dir: Directory to save the barcode image
+        module_width: Width of individual barcode modules (bars)
+        module_height: Height of barcode bars in mm
+        quiet_zone: Blank space on each side of the bars in mm
+        write_text: Draw the human-readable code under the bars
+        name: File name without extension, derived from the code by default
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # Digest of the code avoids filesystem issues with special chars; unlike
+    # hash() it is stable across processes
+    safe_filename = name or hashlib.sha1(code.encode("utf-8")).hexdigest()
+    filename = os.path.join(output_dir, safe_filename)
+    
+    barcode_obj = _code128_class()(code, writer=barcode_writer())
+    barcode_obj.save(filename, options=writer_options(module_width, module_height, quiet_zone, write_text))
+    return filename + ".png"
+
+
+# Resolution of raster barcodes, as used by python-barcode's ImageWriter
+RASTER_DPI = 300
+
+
+def render_barcode_image(
+    code: str, module_width=0.2, module_height=15.0, quiet_zone=6.5, write_text=True, symbology="code128", symbol=None
+):
+    """
+    Render a barcode to an in-memory 1-bit PIL image, without touching disk.
+    
+    Code128 goes through python-barcode's ImageWriter; other symbologies are
+    rasterized from their Symbol with the same geometry and resolution.
+    
+    Args:
+        code: Barcode code string
+        module_width: Width of individual barcode modules (bars) in mm
+        module_height: Height of barcode bars in mm
+        quiet_zone: Blank space on each side of the bars in mm
+        write_text: Draw the human-readable code under the bars
+        symbology: Name of the encoder in SYMBOLOGIES
+        symbol: Already encoded Symbol (not used for Code128)
+    
+    Returns:
+        PIL image in mode "1" (black bars on white)
+    """
+    if symbology == "code128":
+        writer = barcode_writer(mode="1")
+        return _code128_class()(code, writer=writer).render(writer_options(module_width, module_height, quiet_zone, write_text))
+
+    from PIL import Image, ImageDraw
+
+    symbol = symbol or encode_symbol(code, symbology)
+    geometry = symbol_geometry(symbol, module_width, module_height, quiet_zone, write_text)
+    px = RASTER_DPI / 25.4
+    image = Image.new("1", (round(geometry["width"] * px), round(geometry["height"] * px)), 1)
+    draw = ImageDraw.Draw(image)
+    left, unit_x, unit_y = geometry["left"], geometry["unit_x"], geometry["unit_y"]
+    for rx, ry, rw, rh in symbol.rects:
+        x0 = round((left + rx * unit_x) * px)
+        y0 = round((BARCODE_MARGIN + ry * unit_y) * px)
+        x1 = round((left + (rx + rw) * unit_x) * px)
+        y1 = round((BARCODE_MARGIN + (ry + rh) * unit_y) * px)
+        draw.rectangle([x0, y0, x1 - 1, y1 - 1], fill=0)
+
+    if write_text:
+        font = _truetype(fix_barcode_font(), round(geometry["font_size"] * px))
+        baseline = (BARCODE_MARGIN + symbol.height * unit_y + BARCODE_TEXT_DISTANCE) * px
+        draw.text((image.width / 2, baseline), symbol.text, font=font, fill=0, anchor="md")
+    return image
+
+
+def draw_bilevel_image(c, image, x, y, width, height):
+    """
+    Draw a mode "1" PIL image onto the canvas as a 1-bit image XObject.
+    
+    ReportLab's drawImage always embeds 8 bits per colour component; barcode
+    images only need one bit per pixel, which keeps them about 25 times
+    smaller. Identical images share a single XObject, as with drawImage.
+    """
+    data = image.tobytes()
+    name = hashlib.md5(data + repr(image.size).encode("ascii")).hexdigest()
+    reg_name = c._doc.getXObjectName(name)
+    if reg_name not in c._doc.idToObject:
+        img_obj = pdfdoc.PDFImageXObject(name)
+        img_obj.width, img_obj.height = image.size
+        img_obj.bitsPerComponent = 1
+        img_obj.colorSpace = "DeviceGray"
+        # PIL packs mode "1" rows MSB first, padded to whole bytes, with
+        # 1 = white: exactly PDF's 1-bit DeviceGray sample layout
+        img_obj.streamContent = zlib.compress(data)
+        img_obj._filters = ("FlateDecode",)
+        if rl_config.useA85 and getattr(c, "ascii85", True):
+            img_obj.streamContent = asciiBase85Encode(img_obj.streamContent)
+            img_obj._filters = ("ASCII85Decode", "FlateDecode")
+        c._setXObjects(img_obj)
+        c._doc.Reference(img_obj, reg_name)
+        c._doc.addForm(name, img_obj)
+
+    c.saveState()
+    c.translate(x, y)
+    c.scale(width, height)
+    c._code.append(f"/{reg_name} Do")
+    c.restoreState()
+    c._formsinuse.append(name)
+
+
+# Text and margin geometry used by python-barcode's ImageWriter (in mm / pt)
+BARCODE_MARGIN = 1.0
+BARCODE_TEXT_DISTANCE = 5.0
+BARCODE_FONT_SIZE = 10
+BARCODE_FONT_NAME = "Helvetica"
+
+
+def barcode_size_mm(total_modules: int, module_width=0.2, module_height=15.0, quiet_zone=6.5, write_text=True) -> tuple:
+    """Return the (width, height) in mm that ImageWriter would render a barcode at."""
+    width = 2 * quiet_zone + total_modules * module_width
+    height = 2 * BARCODE_MARGIN + module_height
+    if write_text:
+        height += BARCODE_FONT_SIZE * 25.4 / 72 / 2 + BARCODE_TEXT_DISTANCE
+    return width, height
+
+
+def symbol_geometry(symbol, module_width=0.2, module_height=15.0, quiet_zone=6.5, write_text=True) -> dict:
+    """
+    Lay out a Symbol the way ImageWriter lays out a linear barcode (in mm).
+    
+    Linear symbols get quiet_zone on both sides and module_height tall bars.
+    Two-dimensional symbols carry their own quiet zone and are drawn as tall
+    as the bars would be, with square modules.
+    
+    Returns:
+        Dict with the overall width/height, the module size unit_x/unit_y
+        and left offset of the modules, and the text font_size (all in mm)
+    """
+    if symbol.two_d:
+        unit_x = unit_y = module_height / symbol.height
+        left = 0.0
+    else:
+        unit_x, unit_y = module_width, module_height
+        left = quiet_zone
+    width = 2 * left + symbol.width * unit_x
+    height = 2 * BARCODE_MARGIN + symbol.height * unit_y
+    font_size = BARCODE_FONT_SIZE * 25.4 / 72
+    if write_text:
+        height += font_size / 2 + BARCODE_TEXT_DISTANCE
+        if symbol.two_d:
+            # Square symbols are narrower than their text line
+            width = max(width, stringWidth(symbol.text, BARCODE_FONT_NAME, font_size))
+    left = (width - symbol.width * unit_x) / 2
+    return {"width": width, "height": height, "unit_x": unit_x, "unit_y": unit_y, "left": left, "font_size": font_size}
+
+
+def draw_barcode_vector(
+    c,
+    code: str,
+    x,
+    y,
+    max_width,
+    max_height,
+    module_width=0.2,
+    module_height=15.0,
+    quiet_zone=6.5,
+    write_text=True,
+    cache=None,
+    symbol=None,
+    symbology="code128",
+) -> tuple:
+    """
+    Draw a barcode as vector shapes straight onto a ReportLab canvas.
+    
+    The barcode keeps the geometry ImageWriter would rasterize (see
+    symbol_geometry()) and is scaled to fit, centered, inside the given box.
+    
+    Args:
+        c: ReportLab canvas
+        code: Barcode code string
+        x, y: Lower-left corner of the box in points
+        max_width, max_height: Size of the box in points
+        module_width: Width of individual barcode modules (bars) in mm
+        module_height: Height of barcode bars in mm
+        quiet_zone: Blank space on each side of the bars in mm
+        write_text: Draw the human-readable code under the bars
+        cache: Optional RenderCache to reuse encoded symbols from
+        symbol: Already encoded Symbol, skips encoding
+        symbology: Name of the encoder in SYMBOLOGIES
+    
+    Returns:
+        Drawn (width, height) in points
+    """
+    if symbol is None:
+        symbol = cache.symbol(code, symbology) if cache is not None else encode_symbol(code, symbology)
+    geometry = symbol_geometry(symbol, module_width, module_height, quiet_zone, write_text)
+    width_mm, height_mm = geometry["width"], geometry["height"]
+    scale = min(max_width / (width_mm * mm), max_height / (height_mm * mm))
+    width = width_mm * mm * scale
+    height = height_mm * mm * scale
+
+    c.saveState()
+    # Draw in mm units with the origin at the barcode's top-left corner
+    c.translate(x + (max_width - width) / 2, y + (max_height + height) / 2)
+    c.scale(mm * scale, mm * scale)
+
+    top = -BARCODE_MARGIN
+    left, unit_x, unit_y = geometry["left"], geometry["unit_x"], geometry["unit_y"]
+    # Bars in module units: whole numbers keep the content stream short
+    c.saveState()
+    c.transform(unit_x, 0, 0, -unit_y, left, top)
+    path = c.beginPath()
+    for rx, ry, rw, rh in symbol.rects:
+        path.rect(rx, ry, rw, rh)
+    c.drawPath(path, stroke=0, fill=1)
+    c.restoreState()
+
+    if write_text:
+        font_size = geometry["font_size"]
+        # ImageWriter anchors the text's descender line below the bars
+        baseline = top - symbol.height * unit_y - BARCODE_TEXT_DISTANCE - getDescent(BARCODE_FONT_NAME, font_size)
+        c.setFont(BARCODE_FONT_NAME, font_size)
+        c.drawCentredString(width_mm / 2, baseline, symbol.text)
+    c.restoreState()
+    return width, height
+
+
+def calculate_max_rows(
+    cols: int,
+    page_height=A4[1],
+    page_width=A4[0],
+    base_barcode_width=40 * mm,
+    base_barcode_height=20 * mm,
+    min_barcode_height=12 * mm,
+    page_margin_top=5 * mm,
+    page_margin_bottom=5 * mm,
+    page_margin_left=5 * mm,
+    page_margin_right=5 * mm,
+) -> int:
+    """
+    Calculate how many rows of horizontal barcodes fit on a page.
+    """
+    available_height = page_height - page_margin_top - page_margin_bottom
+    available_width = page_width - page_margin_left - page_margin_right
+
+    col_width = available_width / cols
+    aspect_ratio = base_barcode_height / base_barcode_width
+    adjusted_barcode_height = max(min_barcode_height, col_width * aspect_ratio)
+
+    max_rows = int(available_height / adjusted_barcode_height)
+    return max(1, max_rows)
+
+
+class RenderCache:
+    """
+    LRU cache of rendered barcodes keyed by code and geometry.
+    
+    Vector drawing reuses the encoded Symbol (which only depends on the code
+    and symbology), raster drawing reuses the in-memory 1-bit image. Given a
+    directory, rendered images are also saved there as PNG and found again
+    by later runs and by other processes; without one nothing touches disk.
+    
+    max_bytes additionally bounds the estimated memory of the entries: PIL
+    keeps mode "1" images at one byte per pixel, so a cached raster barcode
+    costs about 240 KB at the default size, a Symbol about SYMBOL_BYTES.
+    """
+
+    # Approximate memory of one cached Symbol
+    SYMBOL_BYTES = 3 * 1024
+
+    def __init__(self, maxsize=10000, directory=None, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.persistent = directory is not None
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, the current number of entries and their estimated bytes."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "bytes": self.nbytes}
+
+    def close(self):
+        """Drop all in-memory entries (PNGs in a cache directory are kept)."""
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _store(self, key, entry):
+        size = entry.width * entry.height if key[0] == "image" else self.SYMBOL_BYTES
+        self._entries[key] = entry
+        self._sizes[key] = size
+        self.nbytes += size
+        while len(self._entries) > self.maxsize or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+            old_key, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(old_key)
+        return entry
+
+    def symbol(self, code: str, symbology="code128"):
+        """Cached encode_symbol()."""
+        key = ("symbol", symbology, code)
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            entry = self._store(key, encode_symbol(code, symbology))
+        return entry
+
+    def image(
+        self, code: str, module_width=0.2, module_height=15.0, quiet_zone=6.5, write_text=True,
+        monitor=None, symbology="code128",
+    ):
+        """
+        Return the 1-bit PIL image rendered for code and geometry.
+        
+        A JobMonitor, if given, times rendering ("encode") and loading
+        images back from the cache directory ("probe").
+        """
+        monitor = monitor or JobMonitor()
+        key = ("image", symbology, code, module_width, module_height, quiet_zone, write_text)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+
+        path = None
+        if self.persistent:
+            name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+            path = os.path.join(self.directory, name + ".png")
+            if os.path.exists(path):
+                from PIL import Image
+
+                self.hits += 1
+                with monitor.stage("probe"), Image.open(path) as img:
+                    return self._store(key, img.convert("1"))
+
+        self.misses += 1
+        with monitor.stage("encode"):
+            image = render_barcode_image(code, module_width, module_height, quiet_zone, write_text, symbology)
+        if path:
+            os.makedirs(self.directory, exist_ok=True)
+            # Save under a private name first so concurrent processes sharing
+            # the directory never see a half-written file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            image.save(tmp_path, "PNG")
+            os.replace(tmp_path, path)
+        return self._store(key, image)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job at its next page boundary after JobMonitor.cancel()."""
+
+
+class JobMonitor:
+    """
+    Per-stage timing, progress events and flow control for one generation job.
+    
+    Stages ("generate", "encode", "probe", "draw", "save", "merge") only
+    accumulate time; after every page an event dict is passed to callback:
+    
+        {"type": "page", "page": 12, "items_done": 180, "total": 1000,
+         "latency": 0.04, "items_per_sec": 4100.0, "eta": 0.2,
+         "elapsed": 0.05, "stages": {"encode": 0.01, ...}}
+    
+    A final {"type": "done", ...} event carries the same totals. With
+    keep_trace=True every event is also kept for write_trace().
+    
+    pause(), resume() and cancel() may be called from any thread; the job
+    checks them after every page, blocking while paused and raising
+    JobCancelled once cancelled. Time spent paused is not counted.
+    """
+
+    def __init__(self, callback=None, total=None, keep_trace=False):
+        self.callback = callback
+        self.total = total
+        self.keep_trace = keep_trace
+        self.stages = {}
+        self.events = []
+        self.pages = 0
+        self.items_done = 0
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = False
+        self.start()
+
+    def start(self):
+        """Restart the clock, e.g. when a queued job actually begins."""
+        self.started = time.perf_counter()
+        self._last_page = self.started
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled = True
+        # Wake a paused job so it can stop
+        self._running.set()
+
+    def checkpoint(self):
+        """Block while paused; raise JobCancelled if the job was cancelled."""
+        if not self._running.is_set():
+            paused_at = time.perf_counter()
+            self._running.wait()
+            paused_for = time.perf_counter() - paused_at
+            self.started += paused_for
+            self._last_page += paused_for
+        if self._cancelled:
+            raise JobCancelled()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Add the time spent inside the with-block to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add_stages(self, stages: dict):
+        """Merge stage times measured elsewhere, e.g. in a worker process."""
+        for name, seconds in stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def _emit(self, event):
+        if self.keep_trace:
+            self.events.append(event)
+        if self.callback:
+            self.callback(event)
+
+    def _snapshot(self, event_type):
+        now = time.perf_counter()
+        elapsed = now - self.started
+        rate = self.items_done / elapsed if elapsed > 0 else None
+        eta = None
+        if self.total and rate:
+            eta = max(0.0, (self.total - self.items_done) / rate)
+        return {
+            "type": event_type,
+            "page": self.pages,
+            "items_done": self.items_done,
+            "total": self.total,
+            "elapsed": elapsed,
+            "items_per_sec": rate,
+            "eta": eta,
+            "stages": dict(self.stages),
+        }
+
+    def page_done(self, items: int, pages: int = 1):
+        """Record completed pages holding items codes and emit a page event."""
+        now = time.perf_counter()
+        self.pages += pages
+        self.items_done += items
+        event = self._snapshot("page")
+        event["latency"] = (now - self._last_page) / pages
+        self._last_page = now
+        self._emit(event)
+        self.checkpoint()
+
+    def finish(self):
+        """Emit the final event with total stage times."""
+        self._emit(self._snapshot("done"))
+
+    def write_trace(self, path):
+        """Write all recorded events and stage totals as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages, "events": self.events}, f, indent=2)
+
+
+class Job:
+    """One job of a JobScheduler; state is one of Job.STATES."""
+
+    STATES = ("queued", "running", "paused", "done", "failed", "cancelled")
+    FINISHED = ("done", "failed", "cancelled")
+
+    def __init__(self, job_id: int, name: str):
+        self.id = job_id
+        self.name = name
+        self.state = "queued"
+        self.monitor = JobMonitor()
+        self.result = None
+        self.error = None
+        self.future = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in self.FINISHED
+
+
+class JobScheduler:
+    """
+    Queue of generation jobs run in background threads, max_workers at a time.
+    
+    Each job function is called as func(*args, monitor=job.monitor, **kwargs),
+    so anything that accepts a JobMonitor (save_barcodes_to_pdf, generate_pdf)
+    can be pause()d, resume()d and cancel()led at page boundaries.
+    
+    callback(job, event) receives the job's monitor events plus
+    {"type": "state", "state": ...} on every state change. It is called from
+    worker threads; GUIs must hand it over to their own thread (Tk: root.after).
+    """
+
+    def __init__(self, max_workers=1, callback=None):
+        self.callback = callback
+        self.jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="barcode-job")
+
+    def _notify(self, job, event):
+        if self.callback:
+            self.callback(job, event)
+
+    def _set_state(self, job, state):
+        job.state = state
+        self._notify(job, {"type": "state", "state": state})
+
+    def submit(self, func, *args, name=None, **kwargs) -> Job:
+        """Queue func(*args, monitor=..., **kwargs) and return its Job."""
+        with self._lock:
+            job = Job(next(self._ids), name or func.__name__)
+            job.monitor.callback = lambda event: self._notify(job, event)
+            self.jobs[job.id] = job
+            self._notify(job, {"type": "state", "state": "queued"})
+            job.future = self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        try:
+            # Honour a pause or cancel issued while the job was queued
+            job.monitor.checkpoint()
+            self._set_state(job, "running")
+            job.monitor.start()
+            job.result = func(*args, monitor=job.monitor, **kwargs)
+            state = "done"
+        except JobCancelled:
+            state = "cancelled"
+        except Exception as e:
+            job.error = e
+            state = "failed"
+        self._set_state(job, state)
+
+    def pause(self, job_id):
+        job = self.jobs[job_id]
+        if not job.finished:
+            job.monitor.pause()
+            self._set_state(job, "paused")
+
+    def resume(self, job_id):
+        job = self.jobs[job_id]
+        if job.state == "paused":
+            job.monitor.resume()
+            self._set_state(job, "running" if job.future.running() else "queued")
+
+    def cancel(self, job_id):
+        """Cancel a queued job at once, a running one after its current page."""
+        job = self.jobs[job_id]
+        if job.finished:
+            return
+        job.monitor.cancel()
+        if job.future.cancel():
+            self._set_state(job, "cancelled")
+
+    def active(self) -> list:
+        """Jobs that are queued, running or paused."""
+        return [job for job in self.jobs.values() if not job.finished]
+
+    def shutdown(self, cancel=True, wait=True):
+        if cancel:
+            for job in self.active():
+                self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
+
+
+# Sheet sizes accepted by name wherever a page_size is taken
+PAGE_SIZES = {"A4": A4, "A5": A5, "A3": A3, "Letter": LETTER, "Legal": LEGAL}
+
+# Pre-cut label sheets: page, label size, grid, top/left sheet margins and gaps
+LABEL_TEMPLATES = {
+    "Avery L7160": {"page_size": "A4", "label_width": 63.5 * mm, "label_height": 38.1 * mm, "cols": 3, "rows": 7,
+                    "margin_top": 15.15 * mm, "margin_left": 7.25 * mm, "gap_x": 2.5 * mm, "gap_y": 0},
+    "Avery L7163": {"page_size": "A4", "label_width": 99.1 * mm, "label_height": 38.1 * mm, "cols": 2, "rows": 7,
+                    "margin_top": 15.15 * mm, "margin_left": 4.65 * mm, "gap_x": 2.5 * mm, "gap_y": 0},
+    "Avery L7173": {"page_size": "A4", "label_width": 99.1 * mm, "label_height": 57 * mm, "cols": 2, "rows": 5,
+                    "margin_top": 6 * mm, "margin_left": 4.65 * mm, "gap_x": 2.5 * mm, "gap_y": 0},
+    "Avery L7651": {"page_size": "A4", "label_width": 38.1 * mm, "label_height": 21.2 * mm, "cols": 5, "rows": 13,
+                    "margin_top": 10.7 * mm, "margin_left": 4.75 * mm, "gap_x": 2.5 * mm, "gap_y": 0},
+    "Avery 5160": {"page_size": "Letter", "label_width": 2.625 * inch, "label_height": 1 * inch, "cols": 3, "rows": 10,
+                   "margin_top": 0.5 * inch, "margin_left": 0.1875 * inch, "gap_x": 0.125 * inch, "gap_y": 0},
+    "Avery 5163": {"page_size": "Letter", "label_width": 4 * inch, "label_height": 2 * inch, "cols": 2, "rows": 5,
+                   "margin_top": 0.5 * inch, "margin_left": 0.15625 * inch, "gap_x": 0.1875 * inch, "gap_y": 0},
+    "Avery 5167": {"page_size": "Letter", "label_width": 1.75 * inch, "label_height": 0.5 * inch, "cols": 4, "rows": 20,
+                   "margin_top": 0.5 * inch, "margin_left": 0.3 * inch, "gap_x": 0.3 * inch, "gap_y": 0},
+}
+
+# Slack for floating point sizes that fit exactly (e.g. template pitches), in points
+LAYOUT_EPSILON = 1e-6
+
+
+def resolve_page_size(page_size) -> tuple:
+    """
+    Return (width, height) in points for a PAGE_SIZES name or a size tuple.
+    
+    A height of None stands for continuous roll stock.
+    """
+    if isinstance(page_size, str):
+        try:
+            return PAGE_SIZES[page_size]
+        except KeyError:
+            raise ValueError(f"Unknown page size: {page_size}; known sizes are: {', '.join(PAGE_SIZES)}") from None
+    width, height = page_size
+    if width <= 0 or (height is not None and height <= 0):
+        raise ValueError(f"Page size must be positive, got {page_size!r}")
+    return width, height
+
+
+def _fit(space, size, gap) -> int:
+    """Number of items of size separated by gap that fit into space."""
+    if size > space + LAYOUT_EPSILON:
+        return 0
+    return int((space + gap + LAYOUT_EPSILON) // (size + gap))
+
+
+def _grid_cells(x, top, cols, rows, width, height, gap_x, gap_y, rotated) -> list:
+    """Cells of a cols x rows block whose top-left corner is (x, top), row by row from the top."""
+    return [
+        (x + col * (width + gap_x), top - row * (height + gap_y) - height, width, height, rotated)
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+
+def _block(x, top, space_width, space_height, width, height, gap_x, gap_y, rotated):
+    """Pack one grid block; returns (cells, used width, used height)."""
+    cols = _fit(space_width, width, gap_x)
+    rows = _fit(space_height, height, gap_y)
+    if not cols or not rows:
+        return [], 0, 0
+    cells = _grid_cells(x, top, cols, rows, width, height, gap_x, gap_y, rotated)
+    return cells, cols * (width + gap_x) - gap_x, rows * (height + gap_y) - gap_y
+
+
+def solve_layout(
+    page_size,
+    label_width,
+    label_height,
+    margin_top=5 * mm,
+    margin_bottom=5 * mm,
+    margin_left=5 * mm,
+    margin_right=5 * mm,
+    gap_x=0,
+    gap_y=0,
+    rotate=True,
+) -> list:
+    """
+    Pack as many label_width x label_height labels onto a page as possible.
+    
+    Without rotation the labels form a single grid. With rotate=True the
+    best of the guillotine packings is taken: all labels upright, all turned
+    by 90 degrees, or one grid of either orientation with the strip left
+    over on its right or below it filled with labels of the other
+    orientation. Ties go to the packing with fewer turned labels.
+    
+    Args:
+        page_size: (width, height) in points; height None means roll stock,
+            where every page is one row of labels
+        label_width, label_height: Label size in points
+        margin_*: Unprintable page border in points
+        gap_x, gap_y: Space between neighbouring labels in points
+        rotate: Allow labels turned by 90 degrees
+    
+    Returns:
+        Cells (x, y, width, height, rotated) in fill order; x, y is the
+        lower-left corner on the page and width, height the cell's extent
+        on the page (swapped relative to the label when rotated)
+    """
+    page_width, page_height = page_size
+    space_width = page_width - margin_left - margin_right
+    space_height = page_height - margin_top - margin_bottom
+    top = page_height - margin_top
+    orientations = [(label_width, label_height, False)]
+    if rotate and label_width != label_height:
+        orientations.append((label_height, label_width, True))
+
+    if len(orientations) == 1:
+        plans = [(orientations[0], None)]
+    else:
+        plans = [(orientations[0], orientations[1]), (orientations[1], orientations[0])]
+
+    best = []
+    for first, second in plans:
+        width, height, rotated = first
+        cells, used_width, used_height = _block(
+            margin_left, top, space_width, space_height, width, height, gap_x, gap_y, rotated
+        )
+        candidates = [cells]
+        if second is not None and cells:
+            other_width, other_height, other_rotated = second
+            # The strip right of the grid, full height ...
+            strip_x = margin_left + used_width + gap_x
+            right, _, _ = _block(
+                strip_x, top, space_width - used_width - gap_x, space_height,
+                other_width, other_height, gap_x, gap_y, other_rotated,
+            )
+            # ... or the strip below it, full width
+            below, _, _ = _block(
+                margin_left, top - used_height - gap_y, space_width, space_height - used_height - gap_y,
+                other_width, other_height, gap_x, gap_y, other_rotated,
+            )
+            candidates += [cells + right, cells + below]
+        for candidate in candidates:
+            turned = sum(cell[4] for cell in candidate)
+            if (len(candidate), -turned) > (len(best), -sum(cell[4] for cell in best)):
+                best = candidate
+    return best
+
+
+def _roll_layout(page_width, label_width, label_height, margin_top, margin_bottom, margin_left, margin_right, gap_x, rotate):
+    """Best single-row packing across a roll; returns (page height, cells)."""
+    best = None
+    orientations = [(label_width, label_height, False)]
+    if rotate and label_width != label_height:
+        orientations.append((label_height, label_width, True))
+    for width, height, rotated in orientations:
+        cols = _fit(page_width - margin_left - margin_right, width, gap_x)
+        if not cols:
+            continue
+        page_height = margin_top + height + margin_bottom
+        # Labels per unit of roll length decides the orientation
+        density = cols / page_height
+        if best is None or density > best[0] + LAYOUT_EPSILON:
+            cells = _grid_cells(margin_left, page_height - margin_top, cols, 1, width, height, gap_x, 0, rotated)
+            best = (density, page_height, cells)
+    if best is None:
+        return None, []
+    return best[1], best[2]
+
+
+def page_layout(
+    cols=None,
+    page_size=A4,
+    margin_top=5 * mm,
+    margin_bottom=5 * mm,
+    margin_left=5 * mm,
+    margin_right=5 * mm,
+    barcode_width=40 * mm,
+    barcode_height=20 * mm,
+    gap_x=0,
+    gap_y=0,
+    rotate=False,
+    template=None,
+) -> dict:
+    """
+    Compute the cell table shared by every page of a barcode PDF.
+    
+    Three ways to lay out a page:
+    
+    - cols given: the usable width is split into cols equal columns and the
+      cell height follows the barcode's aspect ratio (see calculate_max_rows)
+    - cols None: cells are exactly barcode_width x barcode_height and are
+      packed densely by solve_layout(), optionally rotated
+    - template: the fixed grid of a LABEL_TEMPLATES sheet; the page size,
+      margins, gaps and cell size all come from the template
+    
+    Args:
+        page_size: PAGE_SIZES name or (width, height) in points; a height of
+            None lays labels out on roll stock, one row per page
+        gap_x, gap_y: Space between cells in points
+        rotate: Let solve_layout() turn labels by 90 degrees
+        template: LABEL_TEMPLATES name
+    
+    Returns:
+        Dict with page size, grid dimensions, the cells as (x, y, width,
+        height, rotated) in fill order, label size and barcode module sizes
+    """
+    if cols is not None and cols < 0:
+        raise ValueError(f"cols must not be negative, got {cols}")
+    if template is not None:
+        try:
+            spec = LABEL_TEMPLATES[template]
+        except KeyError:
+            raise ValueError(f"Unknown label template: {template}") from None
+        page_width, page_height = resolve_page_size(spec["page_size"])
+        cell_width, cell_height = spec["label_width"], spec["label_height"]
+        max_cols, max_rows = spec["cols"], spec["rows"]
+        margin_top, margin_left = spec["margin_top"], spec["margin_left"]
+        gap_x, gap_y = spec["gap_x"], spec["gap_y"]
+        cells = _grid_cells(
+            margin_left, page_height - margin_top, max_cols, max_rows, cell_width, cell_height, gap_x, gap_y, False
+        )
+        barcode_width, barcode_height = cell_width, cell_height
+    elif cols:
+        page_width, page_height = resolve_page_size(page_size)
+        if page_height is None:
+            raise ValueError("Roll stock needs the label size, not a column count (use cols=None)")
+        max_cols = cols
+        max_rows = calculate_max_rows(
+            cols,
+            page_height,
+            page_width,
+            base_barcode_width=barcode_width,
+            base_barcode_height=barcode_height,
+            page_margin_top=margin_top,
+            page_margin_bottom=margin_bottom,
+            page_margin_left=margin_left,
+            page_margin_right=margin_right
+        )
+        cell_width = (page_width - margin_left - margin_right - (cols - 1) * gap_x) / cols
+        cell_height = (page_height - margin_top - margin_bottom - (max_rows - 1) * gap_y) / max_rows
+        cells = _grid_cells(
+            margin_left, page_height - margin_top, cols, max_rows, cell_width, cell_height, gap_x, gap_y, False
+        )
+    else:
+        page_width, page_height = resolve_page_size(page_size)
+        cell_width, cell_height = barcode_width, barcode_height
+        if page_height is None:
+            page_height, cells = _roll_layout(
+                page_width, cell_width, cell_height, margin_top, margin_bottom, margin_left, margin_right, gap_x, rotate
+            )
+        else:
+            cells = solve_layout(
+                (page_width, page_height), cell_width, cell_height,
+                margin_top, margin_bottom, margin_left, margin_right, gap_x, gap_y, rotate,
+            )
+        if not cells:
+            raise ValueError(
+                f"A {cell_width / mm:.1f} x {cell_height / mm:.1f} mm label does not fit on the page inside the margins"
+            )
+        # Columns and rows of the first (main) block, for display
+        first = [cell for cell in cells if cell[4] == cells[0][4]]
+        max_cols = len({cell[0] for cell in first})
+        max_rows = len({cell[1] for cell in first})
+
+    return {
+        "page_size": (page_width, page_height),
+        "cols": max_cols,
+        "rows": max_rows,
+        "per_page": len(cells),
+        "margin_left": margin_left,
+        "margin_top": margin_top,
+        "cell_width": cell_width,
+        "cell_height": cell_height,
+        "cell_margin": 1 * mm,
+        "cells": cells,
+        "rotated": sum(cell[4] for cell in cells),
+        "module_width": (barcode_width / mm) / 95.0,
+        "module_height": barcode_height / mm,
+    }
+
+
+def paper_usage(layout, count: int, copies: int = 1, collate: str = "label") -> dict:
+    """
+    Pages needed for count codes and how much of the paper the labels cover.
+    
+    copies and collate are as in copy_labels(); with collate="sheet" every
+    copy of a short last sheet takes a page of its own.
+    
+    Returns:
+        Dict with pages, labels on the last page and usage, the label area
+        as a fraction of the total paper area of all pages
+    """
+    per_page = layout["per_page"]
+    slots = copied_length(count, copies, collate, per_page) if count > 0 else 0
+    pages = -(-slots // per_page)
+    page_width, page_height = layout["page_size"]
+    label_area = count * copies * layout["cell_width"] * layout["cell_height"]
+    paper_area = pages * page_width * page_height
+    if collate == "sheet" and copies > 1:
+        last_page = count - (-(-count // per_page) - 1) * per_page if pages else 0
+    else:
+        last_page = slots - (pages - 1) * per_page if pages else 0
+    return {
+        "pages": pages,
+        "last_page": last_page,
+        "usage": label_area / paper_area if paper_area else 0.0,
+    }
+
+
+STATIC_LAYER_FORM = "StaticLayer"
+
+
+def draw_static_layer(c, layout, draw_grid=True, cell_count=None):
+    """
+    Draw the page elements that do not depend on the codes (the cell grid).
+    
+    Args:
+        c: ReportLab canvas
+        layout: Grid geometry from page_layout()
+        draw_grid: Draw dashed cell borders
+        cell_count: Only draw the first cell_count cells (partial last page)
+    """
+    cells = layout["cells"][:cell_count]
+    if draw_grid:
+        c.setDash(2, 2)
+        path = c.beginPath()
+        for x0, y0, width, height, _ in cells:
+            path.rect(x0, y0, width, height)
+        c.drawPath(path, stroke=1, fill=0)
+        c.setDash()
+
+
+def stamp_static_layer(c, layout, draw_grid=True):
+    """
+    Place the static layer on the current page.
+    
+    The layer is drawn once per document as a form XObject and referenced
+    from every full page, so its drawing operators are stored only once.
+    """
+    if not draw_grid:
+        return
+    if not c.hasForm(STATIC_LAYER_FORM):
+        c.beginForm(STATIC_LAYER_FORM)
+        draw_static_layer(c, layout, draw_grid)
+        c.endForm()
+    c.doForm(STATIC_LAYER_FORM)
+
+
+def iter_pages(codes, per_page: int):
+    """Yield successive page-sized lists from any iterable of codes."""
+    it = iter(codes)
+    while True:
+        page = list(itertools.islice(it, per_page))
+        if not page:
+            return
+        yield page
+
+
+# Order of the copies when every code is printed several times: "label" puts
+# the copies of a code next to each other, "sheet" repeats each whole sheet
+COLLATE_MODES = ("label", "sheet")
+
+
+def copy_labels(codes, copies: int = 1, collate: str = "label", per_page: int = 1):
+    """
+    Repeat every code copies times, in print order, lazily.
+    
+    With collate="label" the copies of a code follow each other (a a b b c c);
+    with "sheet" each sheet of per_page codes is printed copies times before
+    the next one, e.g. one sheet for the boxes and one for their pallets.
+    Every copy of a short last sheet is padded with None to per_page, so it
+    gets a page of its own and page N of copy k holds the codes of page N of
+    copy 0; draw_page() leaves the padding cells empty.
+    
+    Raises:
+        ValueError: If copies is below 1 or collate is not in COLLATE_MODES
+    """
+    if copies < 1:
+        raise ValueError(f"Copies must be at least 1, got {copies}")
+    if collate not in COLLATE_MODES:
+        raise ValueError(f"Unknown collation: {collate}")
+    if collate == "label":
+        return itertools.chain.from_iterable(itertools.repeat(code, copies) for code in codes)
+    if copies == 1:
+        return iter(codes)
+    return itertools.chain.from_iterable(
+        (page + [None] * (per_page - len(page))) * copies for page in iter_pages(codes, per_page)
+    )
+
+
+def copied_length(count: int, copies: int = 1, collate: str = "label", per_page: int = 1) -> int:
+    """Length of copy_labels() for count codes, padding included."""
+    if collate == "label" or copies == 1:
+        return count * copies
+    return -(-count // per_page) * per_page * copies
+
+
+def label_count(labels) -> int:
+    """Labels in a slice of copy_labels(), not counting the padding."""
+    return sum(label is not None for label in labels)
+
+
+def reuse_mode(copies: int = 1, collate: str = "label"):
+    """
+    draw_page() reuse mode for copies of labels or sheets.
+    
+    A copied sheet is drawn once as a form XObject; a copied label is encoded
+    and drawn once and its operators replayed for the other copies. Neither
+    makes copies free: see draw_label() for what a label copy costs.
+    """
+    if copies == 1:
+        return None
+    return "label" if collate == "label" else "page"
+
+
+# Caption text size in points for labels imported with a text column
+CAPTION_FONT_SIZE = 7
+
+
+def split_label(label) -> tuple:
+    """Return (code, caption) for a plain code or a (code, caption) pair."""
+    if isinstance(label, tuple):
+        return label
+    return label, None
+
+
+def draw_label(
+    c, label, cell, layout, render="vector", cache=None, monitor=None, symbology="code128", reuse=False
+):
+    """
+    Draw one code (or (code, caption) pair) into one cell of the layout.
+    
+    Args:
+        c: ReportLab canvas
+        label: Code or (code, caption) pair
+        cell: (x, y, width, height, rotated) entry of layout["cells"]
+        layout: Grid geometry from page_layout()
+        render: "vector" or "raster"
+        cache: RenderCache to reuse rendered barcodes from (required for raster)
+        monitor: JobMonitor collecting per-stage times
+        symbology: Name of the encoder in SYMBOLOGIES
+        reuse: When the previous cell drawn had the same label and size,
+            replay its drawing operators at this cell instead of drawing it
+            again, for copies printed side by side
+    
+    Replayed copies skip encoding and drawing, but each one still writes its
+    operators into the page: a label-collated file grows by about 40 bytes
+    per extra copy (standard profile; x3: ~185, x10: ~487 B/code) and a copy
+    takes roughly a quarter of the time of a distinct label. A form XObject
+    per label does not make copies free either: each reference still costs
+    7-28 bytes and each form about 600 bytes of its own (dictionary,
+    resources, a separately compressed stream), so forms measured larger
+    and slower below about 30 (compact) to 60 (standard) copies.
+    """
+    monitor = monitor or JobMonitor()
+    x0, y0, cell_width, cell_height, rotated = cell
+
+    if rotated:
+        # Draw the label upright in its own frame, turned 90 degrees onto the page
+        c.saveState()
+        c.translate(x0 + cell_width, y0)
+        c.rotate(90)
+        x0, y0, cell_width, cell_height = 0, 0, cell_height, cell_width
+    if reuse:
+        # Drawn at the origin, the label's operators do not depend on its cell
+        key = (label, cell_width, cell_height, render, symbology)
+        previous = getattr(c, "_previous_label", None)
+        c.saveState()
+        c.translate(x0, y0)
+        if previous is not None and previous[0] == key:
+            with monitor.stage("draw"):
+                c._code.extend(previous[1])
+                c._formsinuse.extend(previous[2])
+        else:
+            code_start, forms_start = len(c._code), len(c._formsinuse)
+            _draw_label_content(c, label, 0, 0, cell_width, cell_height, layout, render, cache, monitor, symbology)
+            c._previous_label = (key, c._code[code_start:], c._formsinuse[forms_start:])
+        c.restoreState()
+    else:
+        _draw_label_content(c, label, x0, y0, cell_width, cell_height, layout, render, cache, monitor, symbology)
+    if rotated:
+        c.restoreState()
+
+
+def _draw_label_content(c, label, x0, y0, cell_width, cell_height, layout, render, cache, monitor, symbology):
+    """Caption and barcode of draw_label(), upright in the given cell."""
+    x_margin = y_margin = layout["cell_margin"]
+    module_width = layout["module_width"]
+    module_height = layout["module_height"]
+    code_str, caption = split_label(label)
+    box_x, box_y = x0 + x_margin, y0 + y_margin
+    box_width, box_height = cell_width - 2 * x_margin, cell_height - 2 * y_margin
+    if caption:
+        # The caption takes a strip at the top of the cell, the barcode the rest
+        with monitor.stage("draw"):
+            c.setFont(BARCODE_FONT_NAME, CAPTION_FONT_SIZE)
+            c.drawCentredString(x0 + cell_width / 2, box_y + box_height - CAPTION_FONT_SIZE, caption)
+        box_height -= CAPTION_FONT_SIZE + y_margin
+
+    if render == "vector":
+        with monitor.stage("encode"):
+            symbol = cache.symbol(code_str, symbology) if cache is not None else encode_symbol(code_str, symbology)
+        with monitor.stage("draw"):
+            draw_barcode_vector(
+                c, code_str,
+                box_x, box_y, box_width, box_height,
+                module_width, module_height,
+                symbol=symbol,
+            )
+    else:
+        image = cache.image(code_str, module_width, module_height, monitor=monitor, symbology=symbology)
+        img_width, img_height = image.size
+        scale = min(box_width / img_width, box_height / img_height)
+        img_width *= scale
+        img_height *= scale
+
+        x = box_x + (box_width - img_width) / 2
+        y = box_y + (box_height - img_height) / 2
+        with monitor.stage("draw"):
+            draw_bilevel_image(c, image, x, y, img_width, img_height)
+
+
+# How draw_page() shares the drawing of copies: None draws every label,
+# "label" replays a label repeated in the next cell (see draw_label(); the
+# file still grows with every copy), "page" draws each distinct page of labels
+# once per document as a form XObject that its copies reference
+REUSE_MODES = (None, "label", "page")
+
+
+def draw_page(
+    c, page_codes, layout, draw_grid=True, render="vector", cache=None, monitor=None, symbology="code128", reuse=None
+):
+    """
+    Draw up to one page of codes onto the canvas's current page.
+    
+    Args:
+        c: ReportLab canvas
+        page_codes: At most layout["per_page"] codes or (code, caption) pairs;
+            trailing None entries (copy_labels() padding) leave cells empty
+        layout: Grid geometry from page_layout()
+        draw_grid: Draw dashed cell borders
+        render: "vector" or "raster"
+        cache: RenderCache to reuse rendered barcodes from (required for raster)
+        monitor: JobMonitor collecting per-stage times
+        symbology: Name of the encoder in SYMBOLOGIES
+        reuse: One of REUSE_MODES, for jobs that print labels or pages
+            several times; a page copy then costs one form reference, a
+            label copy its replayed operators
+    
+    Returns:
+        Number of labels drawn
+    """
+    monitor = monitor or JobMonitor()
+    page_codes = [label for label in page_codes if label is not None]
+    if len(page_codes) == layout["per_page"]:
+        stamp_static_layer(c, layout, draw_grid)
+    else:
+        draw_static_layer(c, layout, draw_grid, len(page_codes))
+
+    if reuse == "page":
+        # Each distinct page of labels becomes one form; its copies only reference it
+        names = c.__dict__.setdefault("_page_forms", {})
+        key = (tuple(page_codes), render, symbology)
+        if key not in names:
+            names[key] = f"Page{len(names)}"
+        name = names[key]
+        if not c.hasForm(name):
+            c.beginForm(name)
+            for label, cell in zip(page_codes, layout["cells"]):
+                draw_label(c, label, cell, layout, render, cache, monitor, symbology)
+            c.endForm()
+        c.doForm(name)
+        return len(page_codes)
+
+    for label, cell in zip(page_codes, layout["cells"]):
+        draw_label(c, label, cell, layout, render, cache, monitor, symbology, reuse == "label")
+    return len(page_codes)
+
+
+class _PreviewPath:
+    """The part of ReportLab's path object the barcode drawing code uses."""
+
+    def __init__(self):
+        self.rects = []
+
+    def rect(self, x, y, width, height):
+        self.rects.append((x, y, width, height))
+
+
+class PreviewCanvas:
+    """
+    Records what the vector drawing code draws, as page-space primitives.
+    
+    Implements just the canvas calls that draw_static_layer(), draw_label()
+    and draw_barcode_vector() make, so a preview goes through exactly the
+    geometry of the PDF. Rectangles are recorded as
+    ("rect", x0, y0, x1, y1, fill, dashed) and text as
+    ("text", x, y, text, font_size, angle), in points from the page's
+    lower-left corner. Only axis-aligned drawing (0/90 degree turns) is
+    supported, which is all the layouts produce.
+    """
+
+    def __init__(self):
+        self.items = []
+        self._matrix = (1, 0, 0, 1, 0, 0)
+        self._font_size = BARCODE_FONT_SIZE
+        self._dashed = False
+        self._stack = []
+        self._forms = {}
+        self._form_name = None
+
+    def _point(self, x, y):
+        a, b, c, d, e, f = self._matrix
+        return a * x + c * y + e, b * x + d * y + f
+
+    def transform(self, a, b, c, d, e, f):
+        A, B, C, D, E, F = self._matrix
+        self._matrix = (
+            A * a + C * b, B * a + D * b,
+            A * c + C * d, B * c + D * d,
+            A * e + C * f + E, B * e + D * f + F,
+        )
+
+    def translate(self, dx, dy):
+        self.transform(1, 0, 0, 1, dx, dy)
+
+    def scale(self, x, y):
+        self.transform(x, 0, 0, y, 0, 0)
+
+    def rotate(self, theta):
+        radians = math.radians(theta)
+        cos, sin = math.cos(radians), math.sin(radians)
+        self.transform(cos, sin, -sin, cos, 0, 0)
+
+    def saveState(self):
+        self._stack.append((self._matrix, self._font_size, self._dashed))
+
+    def restoreState(self):
+        self._matrix, self._font_size, self._dashed = self._stack.pop()
+
+    def setDash(self, *pattern):
+        self._dashed = bool(pattern)
+
+    def setFont(self, name, size, leading=None):
+        self._font_size = size
+
+    def beginPath(self):
+        return _PreviewPath()
+
+    def drawPath(self, path, stroke=1, fill=0):
+        for x, y, width, height in path.rects:
+            x0, y0 = self._point(x, y)
+            x1, y1 = self._point(x + width, y + height)
+            self.items.append(("rect", min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1), bool(fill), self._dashed))
+
+    def drawCentredString(self, x, y, text):
+        a, b, c, d = self._matrix[:4]
+        px, py = self._point(x, y)
+        size = self._font_size * math.sqrt(abs(a * d - b * c))
+        self.items.append(("text", px, py, text, size, math.degrees(math.atan2(b, a))))
+
+    def hasForm(self, name):
+        return name in self._forms
+
+    def beginForm(self, name):
+        self._form_name = name
+        self._page_items, self.items = self.items, []
+
+    def endForm(self):
+        self._forms[self._form_name] = self.items
+        self.items = self._page_items
+
+    def doForm(self, name):
+        self.items.extend(self._forms[name])
+
+
+class PagePreview:
+    """
+    First-page previews drawn through the vector path, with caching.
+    
+    Layouts are cached by their page_layout() arguments, encoded symbols by
+    code, and each cell's primitives by everything it depends on, so a
+    changed setting only recomputes the cells it affects. The cost depends
+    on the cells of one page, never on the job's code count. Not thread
+    safe: use one instance per thread.
+    """
+
+    def __init__(self, cache_size=4096):
+        self.cache_size = cache_size
+        self._layouts = OrderedDict()
+        self._cells = OrderedDict()
+        self._symbols = RenderCache(cache_size)
+
+    def _cached(self, entries, key, compute):
+        try:
+            entries.move_to_end(key)
+            return entries[key]
+        except KeyError:
+            value = entries[key] = compute()
+            if len(entries) > self.cache_size:
+                entries.popitem(last=False)
+            return value
+
+    def layout(self, cols=None, **options) -> dict:
+        """Cached page_layout(cols, **options)."""
+        key = (cols, tuple(sorted(options.items())))
+        return self._cached(self._layouts, key, lambda: page_layout(cols, **options))
+
+    def grid(self, layout, draw_grid=True, cell_count=None) -> list:
+        """Primitives of the static layer (cell borders)."""
+        c = PreviewCanvas()
+        draw_static_layer(c, layout, draw_grid, cell_count)
+        return c.items
+
+    def cell_key(self, layout, index, label, symbology="code128") -> tuple:
+        """Everything the drawing of one cell depends on."""
+        return (
+            label, layout["cells"][index], layout["cell_margin"],
+            layout["module_width"], layout["module_height"], symbology,
+        )
+
+    def cell(self, layout, index, label, symbology="code128") -> list:
+        """Primitives of one label drawn into layout["cells"][index]."""
+        def draw():
+            c = PreviewCanvas()
+            draw_label(c, label, layout["cells"][index], layout, "vector", self._symbols, symbology=symbology)
+            return c.items
+
+        return self._cached(self._cells, self.cell_key(layout, index, label, symbology), draw)
+
+
+# "standard": ReportLab defaults; "compact": smallest file (vector only, binary
+# streams, shared page resources); "pdfx": compact plus a PDF/X-1a style print profile
+PDF_PROFILES = ("standard", "compact", "pdfx")
+
+# Registered printing condition named in the PDF/X output intent
+PDFX_OUTPUT_CONDITION = "FOGRA39"
+PDFX_OUTPUT_CONDITION_INFO = "Coated FOGRA39 (ISO 12647-2:2004)"
+PDFX_FONT_NAME = "BarcodeText"
+
+
+@functools.lru_cache(maxsize=None)
+def embedded_font_name() -> str:
+    """Register the barcode text font for embedding (PDF/X allows no unembedded fonts)."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont(PDFX_FONT_NAME, fix_barcode_font()))
+    return PDFX_FONT_NAME
+
+
+class _PDFXInfo(pdfdoc.PDFInfo):
+    """Document info dictionary with the PDF/X version keys."""
+
+    def format(self, document):
+        D = {
+            "Title": pdfdoc.PDFString(self.title),
+            "Producer": pdfdoc.PDFString(self.producer),
+            "Creator": pdfdoc.PDFString(self.creator),
+            "CreationDate": pdfdoc.PDFDate(ts=document._timeStamp, dateFormatter=self._dateFormatter),
+            "Trapped": pdfdoc.PDFName("False"),
+            "GTS_PDFXVersion": pdfdoc.PDFString("PDF/X-1:2001"),
+            "GTS_PDFXConformance": pdfdoc.PDFString("PDF/X-1a:2001"),
+        }
+        D["ModDate"] = D["CreationDate"]
+        return pdfdoc.PDFDictionary(D).format(document)
+
+
+class CompactCanvas(canvas.Canvas):
+    """
+    Canvas that writes the smallest PDF for vector barcode sheets.
+    
+    Content streams are Flate compressed without the ASCII85 armour, every
+    page points at one shared resource dictionary instead of carrying its
+    own, and the empty page transition entries are dropped. With pdfx=True
+    the barcode text uses an embedded subset TrueType font (embedded once per
+    document), pages get a TrimBox and the document carries a PDF/X-1a:2001
+    style output intent and info keys. Shared resources cover what the
+    barcode pipeline draws (fonts, forms, images), not shadings or ExtGStates.
+    """
+
+    # Read by draw_bilevel_image()
+    ascii85 = False
+
+    def __init__(self, filename, pdfx=False, **kwargs):
+        self._pdfx = pdfx
+        if pdfx:
+            kwargs["initialFontName"] = embedded_font_name()
+        super().__init__(filename, pageCompression=1, **kwargs)
+        self._resources = None
+        self._resources_ref = None
+        if pdfx:
+            self.setTrimBox((0, 0) + tuple(self._pagesize))
+            self._doc.info = _PDFXInfo()
+            catalog = self._doc.Catalog
+            catalog.__NoDefault__ = pdfdoc.PDFCatalog.__NoDefault__ + ["OutputIntents"]
+            catalog.OutputIntents = pdfdoc.PDFArray([pdfdoc.PDFDictionary({
+                "Type": pdfdoc.PDFName("OutputIntent"),
+                "S": pdfdoc.PDFName("GTS_PDFX"),
+                "OutputConditionIdentifier": pdfdoc.PDFString(PDFX_OUTPUT_CONDITION),
+                "Info": pdfdoc.PDFString(PDFX_OUTPUT_CONDITION_INFO),
+                "RegistryName": pdfdoc.PDFString("http://www.color.org"),
+            })])
+
+    def setFont(self, psfontname, size, leading=None):
+        if self._pdfx and psfontname == BARCODE_FONT_NAME:
+            psfontname = embedded_font_name()
+        super().setFont(psfontname, size, leading)
+
+    def showPage(self):
+        pages = self._doc.Pages.pages
+        first_new = len(pages)
+        super().showPage()
+        for page in pages[first_new:]:
+            page.Contents = pdfdoc.PDFStream(content=page.stream, filters=[pdfdoc.PDFZCompress])
+            page.stream = None
+            page.Trans = None
+            if self._resources is None:
+                # The first page's resources become everyone's
+                page.check_format(self._doc)
+                self._resources = page.Resources
+                self._resources_ref = self._doc.Reference(self._resources)
+            else:
+                if page.XObjects:
+                    if isinstance(self._resources.XObject, pdfdoc.PDFDictionary):
+                        self._resources.XObject.dict.update(page.XObjects.dict)
+                    else:
+                        self._resources.XObject = pdfdoc.PDFDictionary(dict(page.XObjects.dict))
+                if page.hasImages:
+                    self._resources.allProcs()
+            page.Resources = self._resources_ref
+
+
+def new_canvas(path, layout, pdf_profile="standard"):
+    """Open a canvas for one output file of the given PDF_PROFILES profile."""
+    if pdf_profile == "standard":
+        return canvas.Canvas(path, pagesize=layout["page_size"])
+    if pdf_profile not in PDF_PROFILES:
+        raise ValueError(f"Unknown PDF profile: {pdf_profile}; known profiles are: {', '.join(PDF_PROFILES)}")
+    return CompactCanvas(path, pdfx=pdf_profile == "pdfx", pagesize=layout["page_size"])
+
+
+def render_pages(
+    pdf_path,
+    codes,
+    layout,
+    draw_grid=True,
+    render="vector",
+    progress_callback=None,
+    cache=None,
+    monitor=None,
+    symbology="code128",
+    pdf_profile="standard",
+    reuse=None,
+):
+    """
+    Draw codes into a new PDF file, filling pages of the given layout in order.
+    
+    Args:
+        pdf_path: Output PDF path
+        codes: Barcode codes, in page order
+        layout: Grid geometry from page_layout()
+        draw_grid: Draw dashed cell borders
+        render: "vector" or "raster"
+        progress_callback: Called with the percentage of codes drawn after each page
+        cache: RenderCache to use, a scratch cache for this call by default
+        monitor: JobMonitor notified after every page
+        symbology: Name of the encoder in SYMBOLOGIES
+        pdf_profile: One of PDF_PROFILES
+        reuse: One of REUSE_MODES, see draw_page()
+    """
+    if render not in ("vector", "raster"):
+        raise ValueError(f"Unknown render mode: {render}")
+
+    monitor = monitor or JobMonitor(total=label_count(codes))
+    own_cache = cache is None
+    if own_cache:
+        cache = RenderCache(JOB_CACHE_SIZE)
+
+    try:
+        c = new_canvas(pdf_path, layout, pdf_profile)
+        count = len(codes)
+        done = 0
+
+        for page_no, page_codes in enumerate(iter_pages(codes, layout["per_page"])):
+            if page_no:
+                c.showPage()
+            drawn = draw_page(c, page_codes, layout, draw_grid, render, cache, monitor, symbology, reuse)
+
+            done += len(page_codes)
+            monitor.page_done(drawn)
+            if progress_callback:
+                progress_callback(int(done / count * 100))
+
+        with monitor.stage("save"):
+            c.save()
+    finally:
+        if own_cache:
+            cache.close()
+
+    return pdf_path
+
+
+def read_codes(source="-"):
+    """
+    Lazily yield one code per non-empty line.
+    
+    Args:
+        source: File path, open text file, or "-" for stdin
+    """
+    if source == "-":
+        source = sys.stdin
+    if hasattr(source, "read"):
+        for line in source:
+            code = line.strip()
+            if code:
+                yield code
+        return
+    with open(source, "r", encoding="utf-8") as f:
+        yield from read_codes(f)
+
+
+# Codes checked per joined string by validate_code128()
+VALIDATION_CHUNK = 65536
+
+
+def validate_code128(codes, chunk_size=VALIDATION_CHUNK) -> dict:
+    """
+    Check a batch of codes for Code128 encodability.
+    
+    Code128 encodes every ASCII character (code sets A and B) and nothing
+    else, so a whole chunk is checked with one str.isascii() over the joined
+    codes, in C; only chunks that fail are scanned code by code. A million
+    codes take well under a second.
+    
+    Returns:
+        Dict mapping the index of every code that cannot be encoded to the reason
+    """
+    problems = {}
+    codes = iter(codes)
+    for start in itertools.count(0, chunk_size):
+        chunk = list(itertools.islice(codes, chunk_size))
+        if not chunk:
+            break
+        if all(chunk) and "".join(chunk).isascii():
+            continue
+        for i, code in enumerate(chunk, start):
+            if not code:
+                problems[i] = "empty code"
+            elif not code.isascii():
+                bad = next(ch for ch in code if ord(ch) > 127)
+                problems[i] = f"character {bad!r} cannot be encoded in Code128"
+    return problems
+
+
+def validate_codes(codes, symbology="code128") -> dict:
+    """
+    Check a batch of codes for encodability in the given symbology.
+    
+    Returns:
+        Dict mapping the index of every code that cannot be encoded to the reason
+    """
+    if symbology == "code128":
+        return validate_code128(codes)
+    if symbology not in SYMBOLOGIES:
+        raise ValueError(f"Unknown symbology: {symbology}")
+    problems = {}
+    for i, code in enumerate(codes):
+        if not code:
+            problems[i] = "empty code"
+            continue
+        try:
+            encode_symbol(code, symbology)
+        except ValueError as e:
+            problems[i] = str(e)
+    return problems
+
+
+def iter_valid_codes(codes, symbology="code128", chunk_size=10000, on_error=None):
+    """
+    Stream codes, dropping the ones the symbology cannot encode.
+    
+    Codes are validated chunk_size at a time with validate_codes(), so a bad
+    code is reported before its page is rendered instead of failing the job
+    halfway through.
+    
+    Args:
+        codes: Any iterable of codes
+        symbology: Symbology the codes are validated against
+        chunk_size: Number of codes validated per batch
+        on_error: Called with (number, message) for every skipped code,
+            numbered from 1
+    
+    Yields:
+        The valid codes, in order
+    """
+    codes = iter(codes)
+    for start in itertools.count(1, chunk_size):
+        chunk = list(itertools.islice(codes, chunk_size))
+        if not chunk:
+            return
+        problems = validate_codes(chunk, symbology)
+        if not problems:
+            yield from chunk
+            continue
+        for i, code in enumerate(chunk):
+            if i in problems:
+                if on_error:
+                    on_error(start + i, problems[i])
+            else:
+                yield code
+
+
+def _table_rows(path, sheet=None):
+    """
+    Yield the rows of a CSV/TSV or XLSX file as lists of strings.
+    
+    A CSV row that cannot be parsed (e.g. a field over the csv module's size
+    limit) is yielded as its csv.Error, and reading goes on with the next one.
+    """
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportError("Reading .xlsx files requires openpyxl (pip install openpyxl)") from None
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet else workbook.active
+            for row in worksheet.iter_rows(values_only=True):
+                yield ["" if value is None else str(value) for value in row]
+        finally:
+            workbook.close()
+        return
+
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        while True:
+            try:
+                yield next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield e
+
+
+def iter_label_rows(
+    path,
+    code_column=0,
+    text_column=None,
+    header=None,
+    sheet=None,
+    chunk_size=10000,
+    on_error=None,
+    symbology="code128",
+):
+    """
+    Stream labels from a CSV/TSV or XLSX file.
+    
+    Rows are read and validated chunk_size at a time, so files of any size
+    stream with flat memory. Rows that cannot be used (malformed, too short
+    or holding an unencodable code) are reported to on_error(row_number,
+    message) in row order and skipped; the rest of the file is still
+    processed.
+    
+    Args:
+        path: .csv, .tsv, .txt or .xlsx file (XLSX needs openpyxl)
+        code_column: Column index (0-based) or header name of the codes
+        text_column: Column index or header name of an optional caption
+        header: Whether the first row is a header; by default only when a
+            column is given by name
+        sheet: Worksheet of an XLSX file, the active one by default
+        chunk_size: Number of rows validated per batch
+        on_error: Called with (row_number, message) for every skipped row
+        symbology: Symbology the codes are validated against
+    
+    Yields:
+        Codes, or (code, caption) pairs when text_column is given
+    """
+    rows = _table_rows(path, sheet)
+    if header is None:
+        header = isinstance(code_column, str) or isinstance(text_column, str)
+
+    row_number = 0
+    if header:
+        names = next(rows, [])
+        if isinstance(names, csv.Error):
+            raise ValueError(f"Cannot read the header row of {path}: {names}")
+        names = [name.strip() for name in names]
+        row_number = 1
+
+        def resolve(column):
+            if not isinstance(column, str):
+                return column
+            if column not in names:
+                raise ValueError(f"Column {column!r} not found in {path}; columns are: {', '.join(names)}")
+            return names.index(column)
+
+        code_column = resolve(code_column)
+        text_column = resolve(text_column)
+
+    while True:
+        chunk = []
+        read = 0
+        # (row number, code, caption, error); errors wait for validation so
+        # that all of a chunk's reports come out in row order
+        for row in itertools.islice(rows, chunk_size):
+            read += 1
+            row_number += 1
+            if isinstance(row, csv.Error):
+                chunk.append((row_number, None, None, f"malformed row: {row}"))
+                continue
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                code = row[code_column].strip()
+                caption = row[text_column].strip() if text_column is not None else None
+            except IndexError:
+                chunk.append((row_number, None, None, f"row has only {len(row)} columns"))
+                continue
+            chunk.append((row_number, code, caption, None))
+        if not read:
+            return
+
+        readable = [i for i, entry in enumerate(chunk) if entry[3] is None]
+        problems = validate_codes([chunk[i][1] for i in readable], symbology)
+        for i, message in problems.items():
+            number, code, caption, _ = chunk[readable[i]]
+            chunk[readable[i]] = (number, code, caption, message)
+        for number, code, caption, error in chunk:
+            if error is not None:
+                if on_error:
+                    on_error(number, error)
+            elif text_column is None:
+                yield code
+            else:
+                yield code, caption
+
+
+# Input files read by iter_label_rows() rather than as one code per line
+TABLE_EXTENSIONS = (".csv", ".tsv", ".xlsx")
+
+
+def stream_barcodes_to_pdf(
+    codes,
+    pdf_name="barcodes.pdf",
+    layout=None,
+    draw_grid=True,
+    render="vector",
+    pages_per_file=None,
+    total=None,
+    progress_callback=None,
+    registry=None,
+    cache=None,
+    monitor=None,
+    symbology="code128",
+    pdf_profile="standard",
+    copies=1,
+    collate="label",
+    limits=None,
+) -> list:
+    """
+    Render an unbounded iterable of codes (or (code, caption) pairs) page by page.
+    
+    Codes are pulled one page at a time, so only the current page is held in
+    memory besides the open PDF. ReportLab keeps an open document's pages
+    until it is saved, so pages_per_file is what bounds memory for long runs:
+    every pages_per_file pages the current file is saved and a new one,
+    numbered name_0001.pdf, name_0002.pdf, ..., is started.
+    
+    Args:
+        codes: Any iterable of codes (generator, read_codes(), list)
+        pdf_name: Output file name, numbered when pages_per_file is set
+        layout: Grid geometry from page_layout(), defaults to 3 columns on A4
+        draw_grid: Draw dashed cell borders
+        render: "vector" or "raster"
+        pages_per_file: Roll over to a new file after this many pages
+        total: Expected number of codes, enables percentage progress
+        progress_callback: Called with the percentage done after each page
+        registry: CodeRegistry that records each file's codes once it is saved
+        cache: RenderCache to use, a scratch cache for this call by default
+        monitor: JobMonitor notified after every page
+        symbology: Name of the encoder in SYMBOLOGIES
+        pdf_profile: One of PDF_PROFILES
+        copies: Print every code this many times, see copy_labels();
+            total counts distinct codes
+        collate: One of COLLATE_MODES
+        limits: ResourceLimits; lowers pages_per_file and the cache size to
+            what its memory cap allows (nothing is written to temporary files)
+    
+    Returns:
+        List of written PDF paths
+    """
+    if render not in ("vector", "raster"):
+        raise ValueError(f"Unknown render mode: {render}")
+
+    layout = layout or page_layout(3)
+    if limits is not None:
+        plan = limits.plan(
+            copied_length(total, copies, collate, layout["per_page"]) if total is not None else None,
+            layout["per_page"], render,
+            codes=len(codes) if isinstance(codes, list) else 0,
+        )
+        if plan["file_pages"] is not None:
+            pages_per_file = min(pages_per_file or plan["file_pages"], plan["file_pages"])
+        if cache is not None and cache.max_bytes is None:
+            cache.max_bytes = plan["cache_bytes"]
+    codes = copy_labels(codes, copies, collate, layout["per_page"])
+    reuse = reuse_mode(copies, collate)
+    if total is not None:
+        total *= copies
+    monitor = monitor or JobMonitor(total=total)
+    base_path = os.path.join(os.getcwd(), pdf_name)
+    root, ext = os.path.splitext(base_path)
+    own_cache = cache is None
+    if own_cache:
+        cache = RenderCache(JOB_CACHE_SIZE, max_bytes=plan["cache_bytes"] if limits is not None else None)
+
+    paths = []
+    file_codes = []
+    c = None
+    pages_in_file = 0
+    done = 0
+
+    def save_file():
+        with monitor.stage("save"):
+            c.save()
+        if registry is not None:
+            registry.add_many(file_codes)
+        file_codes.clear()
+
+    try:
+        for page_codes in iter_pages(codes, layout["per_page"]):
+            if c is not None and pages_per_file and pages_in_file >= pages_per_file:
+                save_file()
+                c = None
+            if c is None:
+                path = f"{root}_{len(paths) + 1:04d}{ext}" if pages_per_file else base_path
+                c = new_canvas(path, layout, pdf_profile)
+                paths.append(path)
+                pages_in_file = 0
+            elif pages_in_file:
+                c.showPage()
+
+            drawn = draw_page(c, page_codes, layout, draw_grid, render, cache, monitor, symbology, reuse)
+            pages_in_file += 1
+            if registry is not None:
+                file_codes.extend(split_label(label)[0] for label in page_codes if label is not None)
+
+            done += drawn
+            monitor.page_done(drawn)
+            if progress_callback and total:
+                progress_callback(min(100, int(done / total * 100)))
+
+        if c is not None:
+            save_file()
+    finally:
+        if own_cache:
+            cache.close()
+
+    monitor.finish()
+    return paths
+
+
+# Entries kept by the scratch RenderCache of a single job
+JOB_CACHE_SIZE = 1024
+
+# Below this many codes process start-up costs more than parallel rendering saves
+PARALLEL_MIN_CODES = 5000
+
+
+def _render_shard(args):
+    """Process pool entry point: render one page-aligned shard to its own PDF."""
+    shard_path, codes, layout, draw_grid, render, cache_dir, cache_bytes, symbology, pdf_profile, reuse = args
+    monitor = JobMonitor()
+    with RenderCache(JOB_CACHE_SIZE, cache_dir, cache_bytes) as cache:
+        render_pages(
+            shard_path, codes, layout, draw_grid, render,
+            cache=cache, monitor=monitor, symbology=symbology, pdf_profile=pdf_profile, reuse=reuse,
+        )
+    return label_count(codes), monitor.pages, monitor.stages
+
+
+def merge_pdfs(paths, pdf_path, pdf_profile="standard"):
+    """
+    Concatenate PDFs into pdf_path, in order, and flush it to disk.
+    
+    Args:
+        pdf_profile: One of PDF_PROFILES, as the parts were written; compact
+            merges drop the resources the parts have in common (font, grid
+            form) down to one copy
+    """
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import NameObject
+
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    if pdf_profile != "standard":
+        writer.compress_identical_objects()
+    if pdf_profile == "pdfx":
+        # Appending copies pages only; take the print profile from the first part
+        first = PdfReader(paths[0])
+        writer.add_metadata(first.metadata)
+        writer.root_object[NameObject("/OutputIntents")] = first.trailer["/Root"]["/OutputIntents"].clone(writer)
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# Pages per checkpoint chunk: a crashed job redoes at most this many pages
+CHECKPOINT_PAGES = 200
+
+
+def _fsync_path(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+class ResourceLimits:
+    """
+    Caps on the memory and temporary disk of one job, and the plan that keeps to them.
+    
+    ReportLab holds every page of an open canvas until it is saved, so memory
+    is set by the pages per canvas (a checkpoint chunk or a rolled over
+    file), the render cache and, for a single output file, pypdf merging the
+    chunks. Temporary disk is the job's checkpoint directory: its chunks and,
+    while they are merged, a second copy of the output. The per-label costs
+    are estimates measured at the default label size (see bench.py).
+    
+    Args:
+        max_memory_mb: Peak resident memory of the job, None for no cap
+        max_temp_mb: Peak size of the job's temporary files, None for no cap
+    
+    Raises:
+        ValueError: If a cap is negative or the memory cap is not above
+            BASE_MEMORY
+    """
+
+    # Resident memory of a process with ReportLab and pypdf (and, for raster
+    # output, PIL and python-barcode) loaded
+    BASE_MEMORY = {"vector": 48 * 2**20, "raster": 64 * 2**20}
+    # Memory of one generated code held in a list
+    CODE_MEMORY = 128
+    # Memory per label while its page sits in an open canvas
+    LABEL_MEMORY = {"vector": 1536, "raster": 10 * 1024}
+    # Memory per label of the output while pypdf merges the chunks
+    MERGE_MEMORY = {"vector": 1536, "raster": 10 * 1024}
+    # Output size per label
+    FILE_BYTES = {"vector": 100, "raster": 1300}
+    # One cached raster image at the default size (PIL keeps a byte per pixel)
+    IMAGE_BYTES = 240 * 1024
+    # Part of the memory left for rendering that goes to the render cache
+    CACHE_SHARE = 0.25
+
+    def __init__(self, max_memory_mb=None, max_temp_mb=None):
+        for name, value in (("max_memory_mb", max_memory_mb), ("max_temp_mb", max_temp_mb)):
+            if value is not None and value < 0:
+                raise ValueError(f"{name} must not be negative, got {value}")
+        base = min(self.BASE_MEMORY.values())
+        if max_memory_mb is not None and max_memory_mb * 2**20 <= base:
+            raise ValueError(f"max_memory_mb must be above {base // 2**20}, got {max_memory_mb}")
+        self.max_memory_mb = max_memory_mb
+        self.max_temp_mb = max_temp_mb
+        self.max_memory = None if max_memory_mb is None else int(max_memory_mb * 2**20)
+        self.max_temp = None if max_temp_mb is None else int(max_temp_mb * 2**20)
+
+    def plan(self, labels, per_page: int, render="vector", workers=1, codes=0) -> dict:
+        """
+        Pick pages per canvas, worker count and cache size for a job.
+        
+        Args:
+            labels: Labels in the job, None when unknown (streamed input)
+            per_page: Labels per page
+            render: "vector" or "raster"
+            workers: Requested worker processes; every worker is a process of
+                its own, so fewer may fit
+            codes: Codes the job holds in memory
+        
+        Returns:
+            Dict with chunk_pages (pages per checkpoint chunk), file_pages
+            (most pages one canvas may hold, None without a memory cap),
+            workers, cache_bytes (None without a memory cap), single_file
+            (whether the checkpointed single output stays within the caps)
+            and memory_bytes and temp_bytes, the estimated peaks of that
+            output or, if it does not fit, of rolling over every file_pages
+            pages without checkpoints
+        
+        Raises:
+            ValueError: If not even one page fits the memory cap
+        """
+        base = self.BASE_MEMORY[render]
+        page_memory = per_page * self.LABEL_MEMORY[render]
+        code_memory = codes * self.CODE_MEMORY
+        default_cache = JOB_CACHE_SIZE * (RenderCache.SYMBOL_BYTES if render == "vector" else self.IMAGE_BYTES)
+        chunk_pages = CHECKPOINT_PAGES
+        file_pages = cache_bytes = None
+        if self.max_memory is not None:
+            free = self.max_memory - base - code_memory
+            if free * (1 - self.CACHE_SHARE) < page_memory:
+                needed = (base + code_memory + page_memory / (1 - self.CACHE_SHARE)) / 2**20
+                raise ValueError(f"max_memory_mb={self.max_memory_mb} cannot hold one page, at least {needed:.0f} needed")
+            if workers > 1:
+                workers = max(1, min(workers, int(free // (base + page_memory / (1 - self.CACHE_SHARE)))))
+            per_worker = free if workers == 1 else free / workers - base
+            cache_bytes = int(min(default_cache, per_worker * self.CACHE_SHARE))
+            file_pages = int((per_worker - cache_bytes) // page_memory)
+            chunk_pages = min(chunk_pages, file_pages)
+        cache_memory = default_cache if cache_bytes is None else cache_bytes
+
+        total_pages = -(-labels // per_page) if labels else 0
+        if workers != 1:
+            # As in save_barcodes_to_pdf: a few chunks per worker
+            chunk_pages = min(chunk_pages, max(1, -(-total_pages // (workers * 4))))
+        merged = total_pages > chunk_pages or (workers > 1 and total_pages > 1)
+        canvas_memory = cache_memory + min(chunk_pages, total_pages) * page_memory
+        if workers > 1:
+            canvas_memory = workers * (base + canvas_memory)
+        merge_memory = labels * self.MERGE_MEMORY[render] if labels and merged else 0
+        memory_bytes = base + code_memory + max(canvas_memory, merge_memory)
+        temp_bytes = (labels or 0) * self.FILE_BYTES[render] * (2 if merged else 1)
+        single_file = (
+            labels is not None
+            and (self.max_memory is None or memory_bytes <= self.max_memory)
+            and (self.max_temp is None or temp_bytes <= self.max_temp)
+        )
+        if not single_file:
+            # Rolled over files are written in place, one canvas at a time
+            pages = total_pages if file_pages is None else min(file_pages, total_pages)
+            memory_bytes = base + code_memory + cache_memory + pages * page_memory
+            temp_bytes = 0
+        return {
+            "chunk_pages": chunk_pages,
+            "file_pages": file_pages,
+            "workers": workers,
+            "cache_bytes": cache_bytes,
+            "single_file": single_file,
+            "memory_bytes": int(memory_bytes),
+            "temp_bytes": int(temp_bytes),
+        }
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this id is running on this machine."""
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        # SYNCHRONIZE access is enough to wait on the process
+        handle = kernel32.OpenProcess(0x00100000, False, pid)
+        if not handle:
+            # ERROR_ACCESS_DENIED: running, but owned by another user
+            return ctypes.get_last_error() == 5
+        try:
+            # WAIT_TIMEOUT: the process has not exited yet
+            return kernel32.WaitForSingleObject(handle, 0) == 0x102
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Seconds a lock file may stay empty while its owner is still writing its pid
+LOCK_GRACE_SECONDS = 10
+
+
+class JobJournal:
+    """
+    Checkpoint of a job writing one PDF: numbered chunk files and a journal.
+    
+    Everything lives in pdf_path + ".parts", next to the output, so jobs
+    writing different files never share it and the final rename stays on
+    one filesystem. journal.json records a fingerprint of the job, the
+    generator state and every finished chunk. Chunks and the journal are
+    flushed and renamed into place, so after a crash the journal lists
+    exactly the chunks that are complete on disk, and running the same job
+    again renders only the rest.
+    
+    A lock file next to the directory (pdf_path + ".parts.lock", created
+    exclusively and holding the owner's pid) keeps two jobs from writing the
+    same output at once; a lock left by a process that is no longer running
+    is taken over, so a crashed job can still be resumed. Call release()
+    when the job ends, however it ends.
+    
+    The directory is created on the first write, so a job that fails before
+    rendering anything leaves nothing behind.
+    """
+
+    def __init__(self, pdf_path, job: dict, chunk_pages: int = CHECKPOINT_PAGES):
+        """
+        Args:
+            pdf_path: Final output path
+            job: Everything the output depends on; a checkpoint of a different
+                job at the same path is discarded
+            chunk_pages: Pages per chunk of a new checkpoint (a resumed one
+                keeps its own)
+        
+        Raises:
+            FileExistsError: If another running job is writing pdf_path
+        """
+        self.pdf_path = os.path.abspath(pdf_path)
+        self.directory = self.pdf_path + ".parts"
+        self.path = os.path.join(self.directory, "journal.json")
+        self.lock_path = self.directory + ".lock"
+        self._locked = False
+        self._lock()
+        fingerprint = hashlib.sha256(json.dumps(job, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if state is None or state.get("job") != fingerprint:
+            # Another job's checkpoint, or none at all
+            shutil.rmtree(self.directory, ignore_errors=True)
+            state = {"job": fingerprint, "chunk_pages": chunk_pages, "generator": {}, "chunks": {}}
+        # Keep only chunks whose file survived intact
+        state["chunks"] = {
+            index: entry for index, entry in state["chunks"].items()
+            if self._size(self.chunk_path(int(index))) == entry["bytes"]
+        }
+        self.state = state
+
+    def _lock(self):
+        """Create the lock file, taking over a lock whose owner is gone."""
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                owner = self._lock_owner()
+                if owner is not None:
+                    raise FileExistsError(
+                        f"{self.pdf_path} is being written by another job (pid {owner}); "
+                        f"wait for it to finish or choose another file"
+                    ) from None
+                # Stale lock of a crashed job: drop it and try again
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self.lock_path)
+                continue
+            with os.fdopen(fd, "w", encoding="ascii") as f:
+                f.write(str(os.getpid()))
+            self._locked = True
+            return
+
+    def _lock_owner(self):
+        """Pid of the running job holding the lock, or None if the lock is stale."""
+        try:
+            with open(self.lock_path, "r", encoding="ascii") as f:
+                text = f.read().strip()
+            age = time.time() - os.path.getmtime(self.lock_path)
+        except FileNotFoundError:
+            return None
+        if not text.isdigit():
+            # The owner may not have written its pid yet
+            return "unknown" if age < LOCK_GRACE_SECONDS else None
+        pid = int(text)
+        return pid if _process_alive(pid) else None
+
+    def release(self):
+        """Remove the lock; the checkpoint stays for a later resume unless discarded."""
+        if self._locked:
+            self._locked = False
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.lock_path)
+
+    @staticmethod
+    def _size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    @property
+    def chunk_pages(self) -> int:
+        return self.state["chunk_pages"]
+
+    @property
+    def chunks(self) -> dict:
+        """Finished chunks: index -> {"codes": ..., "pages": ..., "bytes": ...}."""
+        return {int(index): entry for index, entry in self.state["chunks"].items()}
+
+    def chunk_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"chunk_{index:06d}.pdf")
+
+    def part_path(self, index: int) -> str:
+        """Where chunk index is rendered before commit_chunk() moves it into place."""
+        os.makedirs(self.directory, exist_ok=True)
+        return self.chunk_path(index) + ".part"
+
+    def save(self):
+        """Atomically write the journal."""
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.path + ".part"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def commit_chunk(self, index: int, codes: int, pages: int):
+        """Move a rendered chunk into place and record it."""
+        part_path = self.part_path(index)
+        _fsync_path(part_path)
+        os.replace(part_path, self.chunk_path(index))
+        self.state["chunks"][str(index)] = {
+            "codes": codes, "pages": pages, "bytes": os.path.getsize(self.chunk_path(index)),
+        }
+        self.save()
+
+    def read_codes(self):
+        """Codes stored with write_codes(), or None."""
+        name = self.state["generator"].get("codes_file")
+        if name is None:
+            return None
+        with open(os.path.join(self.directory, name), "r", encoding="utf-8", newline="\n") as f:
+            return f.read().split("\n")[:-1]
+
+    def write_codes(self, codes):
+        """
+        Store the job's codes, for generators whose output cannot be reproduced
+        (unseeded random codes, codes filtered by a CodeRegistry).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "codes.txt")
+        with open(path + ".part", "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(code + "\n" for code in codes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".part", path)
+        self.state["generator"]["codes_file"] = "codes.txt"
+        self.save()
+
+    def assemble(self, chunk_count: int, pdf_profile="standard"):
+        """Join the chunks into the output, replace it atomically and drop the checkpoint."""
+        paths = [self.chunk_path(index) for index in range(chunk_count)]
+        if chunk_count == 1:
+            os.replace(paths[0], self.pdf_path)
+        else:
+            merged_path = os.path.join(self.directory, "output.pdf")
+            merge_pdfs(paths, merged_path, pdf_profile)
+            os.replace(merged_path, self.pdf_path)
+        self.discard()
+
+    def discard(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def render_chunks(
+    journal,
+    chunks,
+    layout,
+    draw_grid=True,
+    render="vector",
+    progress_callback=None,
+    workers=1,
+    cache=None,
+    monitor=None,
+    symbology="code128",
+    pdf_profile="standard",
+    reuse=None,
+):
+    """
+    Render the chunks a JobJournal still misses, committing each as it is done.
+    
+    With workers > 1 chunks are rendered in a process pool, in any order;
+    every chunk is whole pages, so it lays out exactly like the same pages
+    of a single-process run.
+    
+    Args:
+        journal: JobJournal of the job
+        chunks: (index, codes) of the chunks to render
+        progress_callback: Called with the percentage of monitor.total done
+        workers: Number of worker processes
+        cache: RenderCache to use; workers share it through its directory
+            when it is persistent and keep to its max_bytes
+        monitor: JobMonitor notified after every page (serial) or chunk (pool)
+        reuse: One of REUSE_MODES, see draw_page()
+    """
+    monitor = monitor or JobMonitor(total=sum(label_count(codes) for _, codes in chunks))
+
+    def report():
+        if progress_callback and monitor.total:
+            progress_callback(int(monitor.items_done / monitor.total * 100))
+
+    if workers == 1 or len(chunks) < 2:
+        own_cache = cache is None
+        if own_cache:
+            cache = RenderCache(JOB_CACHE_SIZE)
+        try:
+            for index, codes in chunks:
+                pages = monitor.pages
+                # render_pages() reports the share of its chunk; report the whole job's instead
+                render_pages(
+                    journal.part_path(index), codes, layout, draw_grid, render, lambda _: report(), cache, monitor,
+                    symbology, pdf_profile, reuse,
+                )
+                journal.commit_chunk(index, label_count(codes), monitor.pages - pages)
+        finally:
+            if own_cache:
+                cache.close()
+        return
+
+    cache_dir = cache.directory if cache is not None and cache.persistent else None
+    cache_bytes = cache.max_bytes if cache is not None else None
+    # Raster workers set up their writer font before the first chunk arrives
+    initializer = barcode_writer if render == "raster" else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        futures = {
+            pool.submit(
+                _render_shard,
+                (
+                    journal.part_path(index), codes, layout, draw_grid, render, cache_dir, cache_bytes, symbology,
+                    pdf_profile, reuse,
+                ),
+            ): index
+            for index, codes in chunks
+        }
+        try:
+            for future in as_completed(futures):
+                items, pages, stages = future.result()
+                journal.commit_chunk(futures[future], items, pages)
+                monitor.add_stages(stages)
+                monitor.page_done(items, pages)
+                report()
+        except BaseException:
+            # Cancelled or failed: drop chunks that have not started yet
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def save_barcodes_to_pdf(
+    count: int,
+    cols=3,
+    pdf_name="barcodes.pdf",
+    draw_grid=True,
+    progress_callback=None,
+    mode="random_digits",
+    start_code=None,
+    code_length=11,
+    prefix="",
+    suffix="",
+    check=None,
+    margin_top=5 * mm,
+    margin_bottom=5 * mm,
+    margin_left=5 * mm,
+    margin_right=5 * mm,
+    barcode_width=40 * mm,
+    barcode_height=20 * mm,
+    page_size=A4,
+    gap_x=0,
+    gap_y=0,
+    rotate=False,
+    template=None,
+    render="vector",
+    symbology="code128",
+    pdf_profile="standard",
+    copies=1,
+    collate="label",
+    workers=1,
+    seed=None,
+    start_index=0,
+    registry=None,
+    cache=None,
+    monitor=None,
+    limits=None,
+):
+    """Generate PDF with unique barcodes arranged in a grid layout.
+    
+    render="vector" draws bars directly on the canvas, render="raster"
+    embeds a 1-bit image per barcode rendered in memory. With workers > 1
+    pages are rendered in a process pool and merged in order; workers=None
+    picks the CPU count for jobs of PARALLEL_MIN_CODES codes or more.
+    
+    Pages are written in chunks of CHECKPOINT_PAGES pages, journaled by a
+    JobJournal next to the output, and the output appears only once complete,
+    by an atomic rename. Running a crashed job again with the same arguments
+    resumes after its last finished chunk; a cancelled job drops its chunks.
+    With a seed the codes are reproducible, and start_index skips that many
+    codes of the seeded stream or sequence.
+    
+    copies prints every code that many times, next to each other or, with
+    collate="sheet", as whole repeated sheets (see copy_labels()). A copied
+    sheet is drawn once as a form XObject and costs one reference per copy.
+    A copied label is encoded and drawn once and its operators replayed, which
+    saves most of the drawing time but not the space: each label copy adds
+    about 40 bytes (see draw_label()). count is the number of distinct codes.
+    
+    limits, a ResourceLimits, picks the chunk size, worker count and render
+    cache size that keep the job within its memory cap, and a job whose
+    single output file would not fit its memory or temporary disk cap is
+    refused before anything is rendered (generate_pdf() rolls those over to
+    several files instead).
+    
+    Sequential codes can be framed with prefix/suffix text and a check
+    character (check="mod10", "gs1" or "mod43"); see SequentialCodes.
+    
+    The page is laid out by page_layout(): cols columns scaled to the page,
+    or with cols=None labels of exactly barcode_width x barcode_height packed
+    densely on page_size (optionally rotated), or a LABEL_TEMPLATES sheet.
+    
+    pdf_profile="compact" writes the smallest file (use it with vector
+    rendering) and "pdfx" adds a PDF/X-1a style print profile; see
+    CompactCanvas.
+    
+    symbology picks the encoder from SYMBOLOGIES (Code128 by default); the
+    generated codes must fit it, e.g. 12 or 13 digits for "ean13".
+    
+    With a CodeRegistry, previously issued codes are skipped and the new codes
+    are recorded once the PDF has been written.
+    
+    Pass a RenderCache to reuse renders across jobs (e.g. reprints); worker
+    processes share it through its directory when it is persistent.
+    
+    A JobMonitor receives per-stage timings and per-page progress events.
+    """
+    if render not in ("vector", "raster"):
+        raise ValueError(f"Unknown render mode: {render}")
+    # Reject bad copies/collate before any codes are generated
+    copy_labels((), copies, collate)
+
+    pdf_path = os.path.join(os.getcwd(), pdf_name)
+
+    layout = page_layout(
+        cols,
+        page_size,
+        margin_top=margin_top,
+        margin_bottom=margin_bottom,
+        margin_left=margin_left,
+        margin_right=margin_right,
+        barcode_width=barcode_width,
+        barcode_height=barcode_height,
+        gap_x=gap_x,
+        gap_y=gap_y,
+        rotate=rotate,
+        template=template,
+    )
+    per_page = layout["per_page"]
+
+    total = count * copies
+    # Label positions, counting the padding of sheet copies; chunks split these
+    slots = copied_length(count, copies, collate, per_page)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if count >= PARALLEL_MIN_CODES else 1
+    chunk_pages = CHECKPOINT_PAGES
+    own_cache = False
+    if limits is not None:
+        plan = limits.plan(slots, per_page, render, workers, codes=count)
+        if not plan["single_file"]:
+            raise ValueError(
+                f"{total} labels do not fit max_memory_mb={limits.max_memory_mb}, max_temp_mb={limits.max_temp_mb} "
+                f"as one file; write several files with generate_pdf() instead"
+            )
+        workers, chunk_pages = plan["workers"], plan["chunk_pages"]
+        if cache is None:
+            cache, own_cache = RenderCache(JOB_CACHE_SIZE, max_bytes=plan["cache_bytes"]), True
+        elif cache.max_bytes is None:
+            cache.max_bytes = plan["cache_bytes"]
+    if workers != 1:
+        # A few chunks per worker keeps the pool busy and progress updates smooth
+        total_pages = -(-slots // per_page)
+        chunk_pages = min(chunk_pages, max(1, -(-total_pages // (workers * 4))))
+
+    journal = JobJournal(pdf_path, {
+        "count": count, "layout": layout, "draw_grid": draw_grid, "render": render, "symbology": symbology,
+        "pdf_profile": pdf_profile, "mode": mode, "start_code": start_code, "code_length": code_length,
+        "prefix": prefix, "suffix": suffix, "check": check, "seed": seed, "start_index": start_index,
+        "registry": registry is not None, "copies": copies, "collate": collate,
+    }, chunk_pages)
+    try:
+        chunk_size = journal.chunk_pages * per_page
+        chunk_count = max(1, -(-slots // chunk_size))
+        missing = [index for index in range(chunk_count) if index not in journal.chunks]
+        first = missing[0] * chunk_size if missing else slots
+        # Code of the first unfinished label; the copies of code i start at label i * copies,
+        # those of sheet j (padded to per_page) at label j * per_page * copies
+        first_code = first // copies if collate == "label" else first // (per_page * copies) * per_page
+
+        monitor = monitor or JobMonitor()
+        monitor.total = total
+        with monitor.stage("generate"):
+            if registry is None and (seed is not None or mode == "sequential"):
+                # Code i depends only on (seed, i), so a resumed job generates just the unfinished part
+                all_codes = None
+                codes = generate_unique_barcodes(
+                    count - first_code, mode, start_code, code_length, seed=seed, offset=start_index + first_code,
+                    prefix=prefix, suffix=suffix, check=check,
+                )
+            else:
+                all_codes = journal.read_codes()
+                if all_codes is None:
+                    all_codes = generate_unique_barcodes(
+                        count, mode, start_code, code_length, seed=seed, offset=start_index, registry=registry,
+                        prefix=prefix, suffix=suffix, check=check,
+                    )
+                codes = all_codes[first_code:]
+        with monitor.stage("validate"):
+            if symbology == "code128":
+                # Cheap enough to check every code before anything is rendered
+                problems = validate_code128(codes)
+                if problems:
+                    index, reason = next(iter(problems.items()))
+                    raise ValueError(f"{len(problems)} codes cannot be encoded, e.g. {codes[index]!r}: {reason}")
+            elif codes:
+                # Generated codes share one shape, so the first one tells if they fit
+                encode_symbol(codes[0], symbology)
+        if all_codes is not None and not journal.state["generator"]:
+            # Unseeded and registry-filtered codes cannot be generated again on resume
+            journal.write_codes(all_codes)
+
+        finished = journal.chunks.values()
+        if finished:
+            monitor.page_done(sum(entry["codes"] for entry in finished), sum(entry["pages"] for entry in finished))
+
+        labels = list(copy_labels(codes, copies, collate, per_page))[first - first_code * copies:]
+        chunks = [
+            (index, labels[index * chunk_size - first:(index + 1) * chunk_size - first]) for index in missing
+        ]
+        try:
+            render_chunks(
+                journal, chunks, layout, draw_grid, render, progress_callback, workers, cache, monitor, symbology,
+                pdf_profile, reuse_mode(copies, collate),
+            )
+        except JobCancelled:
+            journal.discard()
+            raise
+        finally:
+            if own_cache:
+                cache.close()
+        with monitor.stage("merge"):
+            journal.assemble(chunk_count, pdf_profile)
+    finally:
+        journal.release()
+
+    if registry is not None:
+        registry.add_many(all_codes)
+    monitor.finish()
+    return pdf_path
+
+
+def generate_pdf(
+    output,
+    count=0,
+    cols=3,
+    input_path=None,
+    code_column=0,
+    text_column=None,
+    on_error=None,
+    pages_per_file=None,
+    draw_grid=True,
+    progress_callback=None,
+    mode="random_digits",
+    start_code=None,
+    code_length=11,
+    prefix="",
+    suffix="",
+    check=None,
+    margin_top=5 * mm,
+    margin_bottom=5 * mm,
+    margin_left=5 * mm,
+    margin_right=5 * mm,
+    barcode_width=40 * mm,
+    barcode_height=20 * mm,
+    page_size=A4,
+    gap_x=0,
+    gap_y=0,
+    rotate=False,
+    template=None,
+    render="vector",
+    symbology="code128",
+    pdf_profile="standard",
+    copies=1,
+    collate="label",
+    workers=1,
+    seed=None,
+    start_index=0,
+    registry=None,
+    cache=None,
+    monitor=None,
+    limits=None,
+) -> list:
+    """
+    Batch entry point: write barcode PDFs without any GUI.
+    
+    Takes the same parameters as save_barcodes_to_pdf (sizes in points,
+    layout as in page_layout()).
+    Codes come from input_path when given, otherwise count codes are
+    generated according to mode. CSV/TSV/XLSX inputs are read with
+    iter_label_rows(code_column, text_column, on_error); any other file, or
+    "-" for stdin, holds one code per line and is checked with
+    iter_valid_codes(), which reports unencodable codes to on_error too.
+    With pages_per_file the output rolls over to numbered files. copies and
+    collate repeat every code as in save_barcodes_to_pdf. Progress and
+    stage timings are reported to monitor, a JobMonitor.
+    
+    limits, a ResourceLimits, bounds memory and temporary disk: generated
+    jobs are checkpointed into one file when that fits both caps and are
+    otherwise rolled over to numbered files of as many pages as the memory
+    cap allows, written in place without temporary files. Seeded and
+    sequential codes are then generated as they are drawn instead of being
+    held in memory.
+    
+    Returns:
+        List of written PDF paths
+    """
+    layout = page_layout(
+        cols,
+        page_size,
+        margin_top=margin_top,
+        margin_bottom=margin_bottom,
+        margin_left=margin_left,
+        margin_right=margin_right,
+        barcode_width=barcode_width,
+        barcode_height=barcode_height,
+        gap_x=gap_x,
+        gap_y=gap_y,
+        rotate=rotate,
+        template=template,
+    )
+
+    monitor = monitor or JobMonitor()
+    single_file = True
+    if limits is not None and input_path is None:
+        plan = limits.plan(
+            copied_length(count, copies, collate, layout["per_page"]), layout["per_page"], render, workers or 1,
+            codes=count,
+        )
+        single_file = plan["single_file"]
+    if input_path is not None or pages_per_file or not single_file:
+        if input_path is not None and input_path.lower().endswith(TABLE_EXTENSIONS):
+            codes = iter_label_rows(input_path, code_column, text_column, on_error=on_error, symbology=symbology)
+            total = None
+        elif input_path is not None:
+            codes, total = iter_valid_codes(read_codes(input_path), symbology, on_error=on_error), None
+        elif limits is not None and registry is None and (seed is not None or mode == "sequential"):
+            codes = seeded_code_stream(
+                seed, mode, code_length, start_index, start_index + count, start_code, prefix, suffix, check,
+            )
+            total = count
+        else:
+            with monitor.stage("generate"):
+                codes = generate_unique_barcodes(
+                    count, mode, start_code, code_length, seed=seed, offset=start_index, registry=registry,
+                    prefix=prefix, suffix=suffix, check=check,
+                )
+            total = len(codes)
+        monitor.total = total * copies if total is not None else None
+        return stream_barcodes_to_pdf(
+            codes, output, layout, draw_grid, render, pages_per_file,
+            total=total, progress_callback=progress_callback, registry=registry, cache=cache, monitor=monitor,
+            symbology=symbology, pdf_profile=pdf_profile, copies=copies, collate=collate, limits=limits,
+        )
+
+    return [save_barcodes_to_pdf(
+        count, cols,
+        pdf_name=output,
+        draw_grid=draw_grid,
+        progress_callback=progress_callback,
+        mode=mode,
+        start_code=start_code,
+        code_length=code_length,
+        prefix=prefix,
+        suffix=suffix,
+        check=check,
+        margin_top=margin_top,
+        margin_bottom=margin_bottom,
+        margin_left=margin_left,
+        margin_right=margin_right,
+        barcode_width=barcode_width,
+        barcode_height=barcode_height,
+        page_size=page_size,
+        gap_x=gap_x,
+        gap_y=gap_y,
+        rotate=rotate,
+        template=template,
+        render=render,
+        symbology=symbology,
+        pdf_profile=pdf_profile,
+        copies=copies,
+        collate=collate,
+        workers=workers,
+        seed=seed,
+        start_index=start_index,
+        registry=registry,
+        cache=cache,
+        monitor=monitor,
+        limits=limits,
+    )]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Command line options, mirroring the GUI fields (sizes in mm)."""
+    parser = argparse.ArgumentParser(
+        prog="barcode_gen",
+        description="Generate barcode sheets (Code128, EAN-13, Code 39, ITF-14, QR, DataMatrix) as PDF without the GUI.",
+    )
+    parser.add_argument("-o", "--output", required=True, help="output PDF path")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-n", "--count", type=int, help="number of codes to generate")
+    source.add_argument(
+        "-i", "--input",
+        help="read codes from a CSV/TSV/XLSX table or a file with one code per line ('-' for stdin)",
+    )
+    parser.add_argument("--code-column", default="0", help="column of the codes in a table: 0-based index or header name")
+    parser.add_argument("--text-column", help="column of a caption printed above each barcode")
+    parser.add_argument("--mode", default="random_digits", choices=list(CHARSETS) + ["sequential"])
+    parser.add_argument("--start-code", help="first code in sequential mode")
+    parser.add_argument("--length", type=int, default=11, help="code length, digits of the number in sequential mode (default: 11)")
+    parser.add_argument("--prefix", default="", help="text before each sequential number")
+    parser.add_argument("--suffix", default="", help="text after each sequential number")
+    parser.add_argument("--check", choices=CHECK_SCHEMES, help="append a check character to sequential codes")
+    parser.add_argument("--seed", help="make random codes reproducible")
+    parser.add_argument("--start-index", type=int, default=0, help="skip this many codes of a seeded stream")
+    parser.add_argument(
+        "--cols", type=int, default=3,
+        help="columns per page (default: 3); 0 packs labels of exactly the barcode size as densely as possible",
+    )
+    parser.add_argument("--page-size", type=parse_page_size, default="A4", help=f"{', '.join(PAGE_SIZES)}, WxH in mm, or W for roll stock (default: A4)")
+    parser.add_argument("--template", choices=list(LABEL_TEMPLATES), help="pre-cut label sheet; overrides page size, margins and cols")
+    parser.add_argument("--gap", type=float, default=0, help="space between labels in mm (default: 0)")
+    parser.add_argument("--rotate", action="store_true", help="with --cols 0, also place labels turned by 90 degrees")
+    parser.add_argument("--barcode-width", type=float, default=40, help="barcode width in mm (default: 40)")
+    parser.add_argument("--barcode-height", type=float, default=20, help="barcode height in mm (default: 20)")
+    for side in ("top", "bottom", "left", "right"):
+        parser.add_argument(f"--margin-{side}", type=float, default=5, help=f"{side} page margin in mm (default: 5)")
+    parser.add_argument("--no-grid", action="store_true", help="do not draw cell borders")
+    parser.add_argument("--render", default="vector", choices=["vector", "raster"])
+    parser.add_argument(
+        "--pdf-profile", default="standard", choices=PDF_PROFILES,
+        help="compact: smallest file for vector output; pdfx: compact with embedded font and PDF/X-1a style print profile",
+    )
+    parser.add_argument("--symbology", default="code128", choices=list(SYMBOLOGIES), help="barcode type (default: code128)")
+    parser.add_argument("--copies", type=int, default=1, help="print every code this many times (default: 1)")
+    parser.add_argument(
+        "--collate", default="label", choices=COLLATE_MODES,
+        help="label: copies of a code side by side; sheet: every sheet repeated --copies times (default: label)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, 0 = one per CPU (default: 1)")
+    parser.add_argument("--pages-per-file", type=int, help="roll over to a new numbered PDF after this many pages")
+    parser.add_argument(
+        "--max-memory-mb", type=float,
+        help="cap the job's memory: picks chunk size, workers and cache, and rolls over files when one would not fit",
+    )
+    parser.add_argument(
+        "--max-temp-mb", type=float,
+        help="cap the checkpoint files next to the output; larger jobs are written as files without checkpoints",
+    )
+    parser.add_argument("--registry", help="SQLite file of issued codes to skip and record")
+    parser.add_argument("--cache-dir", help="keep rendered raster barcodes here as PNG across runs")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress")
+    parser.add_argument(
+        "--profile", metavar="PATH",
+        help="write a JSON trace of stage timings and page events to PATH and a cProfile dump to PATH.prof",
+    )
+    return parser
+
+
+def parse_page_size(text: str):
+    """Parse --page-size: a PAGE_SIZES name, WxH in mm, or a roll width W in mm."""
+    if text in PAGE_SIZES:
+        return text
+    try:
+        sizes = [float(value) * mm for value in text.lower().split("x")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid page size: {text!r}") from None
+    if len(sizes) == 1:
+        return sizes[0], None
+    if len(sizes) == 2:
+        return tuple(sizes)
+    raise argparse.ArgumentTypeError(f"invalid page size: {text!r}")
+
+
+def format_event(event) -> str:
+    """One-line progress summary of a JobMonitor event."""
+    parts = [f"page {event['page']}", f"{event['items_done']}"]
+    if event["total"]:
+        parts[-1] += f"/{event['total']} codes ({event['items_done'] * 100 // event['total']}%)"
+    else:
+        parts[-1] += " codes"
+    if event["items_per_sec"]:
+        parts.append(f"{event['items_per_sec']:.0f} codes/s")
+    if event["eta"] is not None:
+        parts.append(f"ETA {int(event['eta']) // 60:02d}:{int(event['eta']) % 60:02d}")
+    return ", ".join(parts)
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+
+    def report(event):
+        print(f"\r{format_event(event)}\033[K", end="", file=sys.stderr, flush=True)
+
+    skipped = [0]
+
+    def report_row_error(row_number, message):
+        skipped[0] += 1
+        print(f"\rrow {row_number}: {message}\033[K", file=sys.stderr)
+
+    def column(value):
+        return int(value) if value is not None and value.isdigit() else value
+
+    monitor = JobMonitor(callback=None if args.quiet else report, keep_trace=bool(args.profile))
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    registry = CodeRegistry(args.registry) if args.registry else None
+    cache = RenderCache(directory=args.cache_dir) if args.cache_dir else None
+    try:
+        paths = generate_pdf(
+            args.output,
+            count=args.count or 0,
+            cols=args.cols or None,
+            input_path=args.input,
+            code_column=column(args.code_column),
+            text_column=column(args.text_column),
+            on_error=report_row_error,
+            pages_per_file=args.pages_per_file,
+            draw_grid=not args.no_grid,
+            mode=args.mode,
+            start_code=args.start_code,
+            prefix=args.prefix,
+            suffix=args.suffix,
+            check=args.check,
+            code_length=args.length,
+            margin_top=args.margin_top * mm,
+            margin_bottom=args.margin_bottom * mm,
+            margin_left=args.margin_left * mm,
+            margin_right=args.margin_right * mm,
+            barcode_width=args.barcode_width * mm,
+            barcode_height=args.barcode_height * mm,
+            page_size=args.page_size,
+            gap_x=args.gap * mm,
+            gap_y=args.gap * mm,
+            rotate=args.rotate,
+            template=args.template,
+            render=args.render,
+            symbology=args.symbology,
+            pdf_profile=args.pdf_profile,
+            copies=args.copies,
+            collate=args.collate,
+            workers=args.workers or None,
+            seed=args.seed,
+            start_index=args.start_index,
+            registry=registry,
+            cache=cache,
+            monitor=monitor,
+            limits=(
+                ResourceLimits(args.max_memory_mb, args.max_temp_mb)
+                if args.max_memory_mb is not None or args.max_temp_mb is not None else None
+            ),
+        )
+    except (ValueError, OSError) as e:
+        print(f"\nbarcode_gen: error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if registry is not None:
+            registry.close()
+        if cache is not None:
+            cache.close()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile + ".prof")
+            monitor.write_trace(args.profile)
+
+    if skipped[0]:
+        print(f"\nbarcode_gen: skipped {skipped[0]} invalid rows", file=sys.stderr)
+    if not args.quiet:
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in sorted(monitor.stages.items()))
+        print(f"\n{stages}", file=sys.stderr)
+    for path in paths:
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    # Needed for the process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
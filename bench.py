@@ -0,0 +1,373 @@
+"""Benchmarks for the barcode generation, rendering and PDF layout hot paths.
+
+Every case runs in a fresh worker process so peak RSS is per case. Results are
+written as JSON and can be compared against an earlier run:
+
+    python bench.py --counts 1000,10000 --output before.json
+    python bench.py --counts 1000,10000 --compare before.json --max-regression 10
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import itertools
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib.units import mm
+
+import barcode_gen
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes(who="self"):
+    """Peak resident set size of this process (or of its largest child), or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class TempDiskSampler(threading.Thread):
+    """Poll the total size of some directories in the background and remember the peak."""
+
+    def __init__(self, paths, interval=0.01):
+        super().__init__(daemon=True)
+        self.paths = paths
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def size(self):
+        return sum(directory_size(path) for path in self.paths)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, self.size())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self.size())
+        return self.peak
+
+
+def bench_generate(case, workdir):
+    barcode_gen.generate_unique_barcodes(case["count"], case["mode"], length=case["length"])
+    return {"items": case["count"]}
+
+
+def bench_validate(case, workdir):
+    codes = barcode_gen.generate_unique_barcodes(case["count"], case["mode"], length=case["length"])
+    start = time.perf_counter()
+    barcode_gen.validate_codes(codes, case.get("symbology", "code128"))
+    return {"items": case["count"], "seconds": time.perf_counter() - start}
+
+
+def bench_render(case, workdir):
+    codes = barcode_gen.generate_unique_barcodes(case["count"], case["mode"], length=case["length"])
+    layout = barcode_gen.page_layout(case["cols"] or None, barcode_width=case["width"] * mm, barcode_height=case["height"] * mm)
+    start = time.perf_counter()
+    symbology = case.get("symbology", "code128")
+    if case["render"] == "vector":
+        for code in codes:
+            barcode_gen.encode_symbol(code, symbology)
+    else:
+        for code in codes:
+            barcode_gen.render_barcode_image(code, layout["module_width"], layout["module_height"], symbology=symbology)
+    return {"items": case["count"], "seconds": time.perf_counter() - start}
+
+
+def bench_layout(case, workdir):
+    # cols=0 runs the dense packing solver instead of the column grid
+    for _ in range(case["count"]):
+        barcode_gen.page_layout(
+            case["cols"] or None, barcode_width=case["width"] * mm, barcode_height=case["height"] * mm, rotate=True
+        )
+    return {"items": case["count"]}
+
+
+def case_limits(case):
+    if "max_memory_mb" not in case and "max_temp_mb" not in case:
+        return None
+    return barcode_gen.ResourceLimits(case.get("max_memory_mb"), case.get("max_temp_mb"))
+
+
+def bench_pdf(case, workdir):
+    pdf_path = os.path.join(workdir, PDF_NAME)
+    labels = case["count"] * case.get("copies", 1)
+    monitor = barcode_gen.JobMonitor()
+    limits = case_limits(case)
+    # A limited job may be rolled over to several files
+    paths = barcode_gen.generate_pdf(
+        pdf_path,
+        case["count"],
+        case["cols"],
+        mode=case["mode"],
+        code_length=case["length"],
+        barcode_width=case["width"] * mm,
+        barcode_height=case["height"] * mm,
+        render=case["render"],
+        symbology=case.get("symbology", "code128"),
+        pdf_profile=case.get("pdf_profile", "standard"),
+        copies=case.get("copies", 1),
+        collate=case.get("collate", "label"),
+        workers=case["workers"],
+        monitor=monitor,
+        limits=limits,
+    )
+    layout = barcode_gen.page_layout(case["cols"] or None, barcode_width=case["width"] * mm, barcode_height=case["height"] * mm)
+    pdf_bytes = sum(os.path.getsize(path) for path in paths)
+    result = {
+        "items": labels,
+        "pages": -(-labels // layout["per_page"]),
+        "pdf_bytes": pdf_bytes,
+        "bytes_per_label": pdf_bytes / labels,
+        "files": len(paths),
+        "stages": monitor.stages,
+    }
+    if limits is not None:
+        # The estimates the caps were planned with, to compare with the measured peaks
+        result["plan"] = limits.plan(labels, layout["per_page"], case["render"], case["workers"], codes=case["count"])
+    return result
+
+
+# Output of the pdf target; its checkpoint directory counts as temporary disk
+PDF_NAME = "bench.pdf"
+
+BENCHMARKS = {
+    "generate": bench_generate,
+    "validate": bench_validate,
+    "render": bench_render,
+    "layout": bench_layout,
+    "pdf": bench_pdf,
+}
+
+
+def run_case(case):
+    """Run one case; executed in a fresh worker process."""
+    workdir = tempfile.mkdtemp(prefix="barcode_bench_")
+    scratch = os.path.join(workdir, "tmp")
+    os.makedirs(scratch)
+    # Route every tempfile user (render caches, shards) into a directory we can measure
+    tempfile.tempdir = scratch
+    sampler = TempDiskSampler([scratch, os.path.join(workdir, PDF_NAME + ".parts")])
+    sampler.start()
+    try:
+        start = time.perf_counter()
+        result = BENCHMARKS[case["target"]](case, workdir)
+        seconds = result.pop("seconds", time.perf_counter() - start)
+    finally:
+        temp_peak = sampler.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result.update({
+        "seconds": seconds,
+        "codes_per_sec": result["items"] / seconds if seconds else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "temp_peak_bytes": temp_peak,
+    })
+    if "pages" in result:
+        result["pages_per_sec"] = result["pages"] / seconds if seconds else None
+    limits = case_limits(case)
+    if limits is not None:
+        result.update(limit_use(limits, result, case.get("workers", 1)))
+    return result
+
+
+def limit_use(limits, result, workers):
+    """Share of each configured cap the run used at its peak (1.0 = exactly at the cap)."""
+    memory = result["peak_rss_bytes"]
+    if memory is not None and workers > 1:
+        # Workers run side by side; the largest one's peak bounds each of them
+        memory += workers * (peak_rss_bytes("children") or 0)
+    use = {}
+    if limits.max_memory is not None and memory is not None:
+        use["memory_use"] = memory / limits.max_memory
+    if limits.max_temp:
+        use["temp_use"] = result["temp_peak_bytes"] / limits.max_temp
+    return use
+
+
+def case_key(case):
+    return "|".join(f"{name}={case[name]}" for name in sorted(case))
+
+
+def build_cases(args):
+    sweep = itertools.product(
+        args.targets, args.counts, args.modes, args.lengths, args.cols, args.sizes, args.renders, args.symbologies,
+        args.pdf_profiles, args.copies, args.collates, args.max_memory_mb, args.max_temp_mb,
+    )
+    cases = []
+    for (
+        target, count, mode, length, cols, (width, height), render, symbology, pdf_profile, copies, collate,
+        max_memory_mb, max_temp_mb,
+    ) in sweep:
+        case = {"target": target, "count": count, "mode": mode, "length": length}
+        # Only vary the parameters each target actually depends on
+        if target in ("render", "pdf"):
+            case.update({"cols": cols, "width": width, "height": height, "render": render})
+        elif target == "layout":
+            case.update({"cols": cols, "width": width, "height": height})
+        # Code128 cases keep their old keys so earlier baselines still compare
+        if target in ("validate", "render", "pdf") and symbology != "code128":
+            case["symbology"] = symbology
+        if target == "pdf":
+            case["workers"] = args.workers
+            if pdf_profile != "standard":
+                case["pdf_profile"] = pdf_profile
+            if copies != 1:
+                case.update({"copies": copies, "collate": collate})
+            # Uncapped cases keep their old keys
+            if max_memory_mb is not None:
+                case["max_memory_mb"] = max_memory_mb
+            if max_temp_mb is not None:
+                case["max_temp_mb"] = max_temp_mb
+        if case not in cases:
+            cases.append(case)
+    return cases
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, max_regression):
+    """Return the cases whose throughput dropped by more than max_regression percent."""
+    previous = {case_key(r["case"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        before = previous.get(case_key(r["case"]))
+        if not before or not before["codes_per_sec"] or not r["codes_per_sec"]:
+            continue
+        change = (r["codes_per_sec"] / before["codes_per_sec"] - 1) * 100
+        r["change_percent"] = change
+        if change < -max_regression:
+            regressions.append(r)
+    return regressions
+
+
+def csv_list(kind):
+    return lambda text: [kind(item) for item in text.split(",") if item]
+
+
+def optional_list(kind):
+    """Like csv_list, with "none" for no value."""
+    return lambda text: [None if item == "none" else kind(item) for item in text.split(",") if item]
+
+
+def size_list(text):
+    return [tuple(float(v) for v in item.split("x")) for item in text.split(",") if item]
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Benchmark barcode generation, rendering and PDF layout.")
+    parser.add_argument("--targets", type=csv_list(str), default=list(BENCHMARKS), help="comma separated: " + ",".join(BENCHMARKS))
+    parser.add_argument("--counts", type=csv_list(int), default=[1000, 10000], help="e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--modes", type=csv_list(str), default=["random_digits"])
+    parser.add_argument("--lengths", type=csv_list(int), default=[11])
+    parser.add_argument("--cols", type=csv_list(int), default=[3])
+    parser.add_argument("--sizes", type=size_list, default=[(40.0, 20.0)], help="barcode WxH in mm, e.g. 40x20,60x30")
+    parser.add_argument("--renders", type=csv_list(str), default=["vector"], help="vector,raster")
+    parser.add_argument(
+        "--symbologies", type=csv_list(str), default=["code128"], help="for render/pdf: " + ",".join(barcode_gen.SYMBOLOGIES)
+    )
+    parser.add_argument(
+        "--pdf-profiles", type=csv_list(str), default=["standard"],
+        help="for pdf: " + ",".join(barcode_gen.PDF_PROFILES),
+    )
+    parser.add_argument("--copies", type=csv_list(int), default=[1], help="for pdf: copies of every code, e.g. 1,3,10")
+    parser.add_argument(
+        "--collates", type=csv_list(str), default=["label"], help="for pdf: " + ",".join(barcode_gen.COLLATE_MODES)
+    )
+    parser.add_argument(
+        "--max-memory-mb", type=optional_list(float), default=[None], help="for pdf: memory caps, e.g. none,128,256",
+    )
+    parser.add_argument(
+        "--max-temp-mb", type=optional_list(float), default=[None], help="for pdf: temporary disk caps, e.g. none,0,50",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="workers for the pdf target")
+    parser.add_argument("--output", help="write JSON results here")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed throughput drop in percent (default: 10)")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    unknown = set(args.targets) - set(BENCHMARKS)
+    if unknown:
+        print(f"Unknown targets: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    results = []
+    for case in build_cases(args):
+        # A fresh process per case keeps peak RSS and caches independent
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_case, case).result()
+        result["case"] = case
+        results.append(result)
+        pages = f" {result['pages_per_sec']:9.1f} pages/s" if "pages_per_sec" in result else ""
+        rss = f" {result['peak_rss_bytes'] / 2**20:7.1f} MiB" if result["peak_rss_bytes"] else ""
+        size = f" {result['bytes_per_label']:8.1f} B/label" if "bytes_per_label" in result else ""
+        caps = "".join(
+            f" {name} {result[key]:4.0%} of cap" for name, key in (("memory", "memory_use"), ("temp", "temp_use"))
+            if key in result
+        )
+        print(f"{case_key(case):80s} {result['codes_per_sec']:12.0f} codes/s{pages}{rss}{size}{caps}")
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+    status = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        for r in regressions:
+            print(f"REGRESSION {case_key(r['case'])}: {r['change_percent']:.1f}%", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,50 +1,62 @@
 import os
 import sys
+import math
+import time
 import threading
+import multiprocessing
 import webbrowser
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from barcode import Code128
-from barcode.writer import ImageWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from PIL import Image
-import tempfile
-import shutil
-import random
 import json
-import string
-
-
-def fix_barcode_font():
-    """Force python-barcode to use a known, bundled font file."""
-    from barcode.writer import ImageWriter
-    
-    # Try multiple font locations
-    possible_fonts = [
-        os.path.join(os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else __file__), "arial.ttf"),
-        "C:\\Windows\\Fonts\\arial.ttf",
-        "C:\\Windows\\Fonts\\Arial.ttf",
-        "C:\\Windows\\Fonts\\DejaVuSans.ttf",
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Linux
-        "/System/Library/Fonts/Helvetica.ttc",  # macOS
-    ]
-    
-    font_path = None
-    for path in possible_fonts:
-        if os.path.exists(path):
-            font_path = path
-            break
-    
-    if font_path:
-        try:
-            ImageWriter.font_path = font_path
-        except Exception as e:
-            print(f"Could not set font: {e}")
-
-
-fix_barcode_font()
+import itertools
+import contextlib
+
+from barcode_gen import (
+    LABEL_TEMPLATES,
+    PAGE_SIZES,
+    CodeRegistry,
+    JobScheduler,
+    PagePreview,
+    copy_labels,
+    generate_unique_barcodes,
+    page_layout,
+    paper_usage,
+    save_barcodes_to_pdf,
+)
+
+# Jobs rendered at the same time; further jobs wait in the queue
+MAX_CONCURRENT_JOBS = 2
+
+# Barcode types offered in the GUI, keyed by their barcode_gen.SYMBOLOGIES name
+SYMBOLOGY_NAMES = {
+    "code128": "Code128",
+    "ean13": "EAN-13",
+    "code39": "Code 39",
+    "itf14": "ITF-14",
+    "qr": "QR kod",
+    "datamatrix": "DataMatrix",
+}
+
+# Quiet time after the last settings change before layout and preview are recomputed
+SETTINGS_DEBOUNCE_MS = 150
+
+# Preview canvas size in pixels, and how often finished cells are handed to Tk
+PREVIEW_SIZE = (240, 340)
+PREVIEW_BATCH_SECONDS = 0.05
+
+# Random codes in the preview come from this seed unless one is set, so the
+# preview stays the same while other settings are edited
+PREVIEW_SEED = "preview"
+
+JOB_STATE_NAMES = {
+    "queued": "Navbatda",
+    "running": "Bajarilmoqda",
+    "paused": "To'xtatilgan",
+    "done": "Tayyor",
+    "failed": "Xatolik",
+    "cancelled": "Bekor qilindi",
+}
 
 
 def resource_path(relative_path):
@@ -56,215 +68,13 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
-def generate_unique_barcodes(count: int, mode: str = "random_digits", start_code: str = None, length: int = 11) -> list:
-    """
-    Generate a list of unique Code128 barcodes.
-    
-    Args:
-        count: Number of barcodes to generate
-        mode: Generation mode - "random_digits", "random_alphanumeric", "random_full", "sequential"
-        start_code: Starting code for sequential mode
-        length: Length of generated codes
-    
-    Returns:
-        List of barcode codes as strings
-    """
-    if mode == "random_digits":
-        # Only digits (0-9)
-        charset = string.digits
-        barcodes = set()
-        while len(barcodes) < count:
-            code = ''.join(random.choices(charset, k=length))
-            barcodes.add(code)
-        return list(barcodes)
-    
-    elif mode == "random_alphanumeric":
-        # Letters and digits (A-Z, 0-9)
-        charset = string.ascii_uppercase + string.digits
-        barcodes = set()
-        while len(barcodes) < count:
-            code = ''.join(random.choices(charset, k=length))
-            barcodes.add(code)
-        return list(barcodes)
-    
-    elif mode == "random_full":
-        # Full ASCII printable characters (excluding space for readability)
-        charset = string.ascii_letters + string.digits + string.punctuation.replace(' ', '')
-        barcodes = set()
-        while len(barcodes) < count:
-            code = ''.join(random.choices(charset, k=length))
-            barcodes.add(code)
-        return list(barcodes)
-    
-    elif mode == "sequential":
-        # Sequential mode - numeric only
-        if start_code is None or not start_code.isdigit():
-            start_code = "1".zfill(length)
-        
-        barcodes = []
-        current = int(start_code)
-        for i in range(count):
-            barcodes.append(str(current).zfill(length))
-            current += 1
-        return barcodes
-    
-    else:
-        raise ValueError(f"Unknown mode: {mode}")
-
-
-def generate_barcode(code: str, output_dir, module_width=0.2, module_height=15.0):
-    """Generate a single barcode image and return its path.
-    
-    Args:
-        code: Barcode code string
-        output_dir: Directory to save the barcode image
-        module_width: Width of individual barcode modules (bars)
-        module_height: Height of barcode bars in mm
-    """
-    os.makedirs(output_dir, exist_ok=True)
-    # Use hash of code for filename to avoid filesystem issues with special chars
-    safe_filename = str(abs(hash(code)))
-    filename = os.path.join(output_dir, safe_filename)
-    
-    # Configure writer options to prevent font issues
-    writer_options = {
-        'write_text': True,
-        'module_height': module_height,
-        'module_width': module_width,
-        'quiet_zone': 6.5,
-    }
-    
-    barcode_obj = Code128(code, writer=ImageWriter())
-    barcode_obj.save(filename, options=writer_options)
-    return filename + ".png"
-
-
-def calculate_max_rows(
-    cols: int,
-    page_height=A4[1],
-    page_width=A4[0],
-    base_barcode_width=40 * mm,
-    base_barcode_height=20 * mm,
-    min_barcode_height=12 * mm,
-    page_margin_top=5 * mm,
-    page_margin_bottom=5 * mm,
-    page_margin_left=5 * mm,
-    page_margin_right=5 * mm,
-) -> int:
-    """
-    Calculate how many rows of horizontal barcodes fit on a page.
-    """
-    available_height = page_height - page_margin_top - page_margin_bottom
-    available_width = page_width - page_margin_left - page_margin_right
-
-    col_width = available_width / cols
-    aspect_ratio = base_barcode_height / base_barcode_width
-    adjusted_barcode_height = max(min_barcode_height, col_width * aspect_ratio)
-
-    max_rows = int(available_height / adjusted_barcode_height)
-    return max(1, max_rows)
-
-
-def save_barcodes_to_pdf(
-    count: int,
-    cols=3,
-    pdf_name="barcodes.pdf",
-    draw_grid=True,
-    progress_callback=None,
-    mode="random_digits",
-    start_code=None,
-    code_length=11,
-    margin_top=5 * mm,
-    margin_bottom=5 * mm,
-    margin_left=5 * mm,
-    margin_right=5 * mm,
-    barcode_width=40 * mm,
-    barcode_height=20 * mm,
-):
-    """Generate PDF with unique barcodes arranged in a grid layout."""
-    pdf_path = os.path.join(os.getcwd(), pdf_name)
-    temp_dir = tempfile.mkdtemp()
-
-    try:
-        c = canvas.Canvas(pdf_path, pagesize=A4)
-        page_width, page_height = A4
-
-        codes = generate_unique_barcodes(count, mode, start_code, code_length)
-        
-        max_rows = calculate_max_rows(
-            cols,
-            page_height,
-            page_width,
-            base_barcode_width=barcode_width,
-            base_barcode_height=barcode_height,
-            page_margin_top=margin_top,
-            page_margin_bottom=margin_bottom,
-            page_margin_left=margin_left,
-            page_margin_right=margin_right
-        )
-
-        barcodes_per_page = cols * max_rows
-        
-        usable_width = page_width - margin_left - margin_right
-        usable_height = page_height - margin_top - margin_bottom
-
-        cell_width = usable_width / cols
-        cell_height = usable_height / max_rows
-
-        x_margin = 1 * mm
-        y_margin = 1 * mm
-
-        module_width = (barcode_width / mm) / 95.0
-        module_height = barcode_height / mm
-
-        for idx, code_str in enumerate(codes):
-            img_path = generate_barcode(code_str, temp_dir, module_width, module_height)
-            
-            page_idx = idx % barcodes_per_page
-            row = page_idx // cols
-            col = page_idx % cols
-
-            if idx > 0 and idx % barcodes_per_page == 0:
-                c.showPage()
-
-            x0 = margin_left + col * cell_width
-            y0 = page_height - margin_top - (row + 1) * cell_height
-
-            if draw_grid:
-                c.setDash(2, 2)
-                c.rect(x0, y0, cell_width, cell_height)
-                c.setDash()
-
-            with Image.open(img_path) as img:
-                img_width, img_height = img.size
-                scale = min(
-                    (cell_width - 2 * x_margin) / img_width,
-                    (cell_height - 2 * y_margin) / img_height
-                )
-                img_width *= scale
-                img_height *= scale
-
-            x = x0 + (cell_width - img_width) / 2
-            y = y0 + (cell_height - img_height) / 2
-            c.drawImage(img_path, x, y, width=img_width, height=img_height)
-
-            if progress_callback:
-                progress_callback(int((idx + 1) / count * 100))
-
-        c.save()
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
-    return pdf_path
-
-
 class BarcodeGeneratorApp:
     """Modern ergonomic Shtrix-kod PDF Generator with full Code128 support"""
     
     def __init__(self, root):
         self.root = root
         self.root.title("Shtrix-kod PDF Generatori (Code128 To'liq)")
-        self.root.geometry("420x810")
+        self.root.geometry("680x1170")
         self.root.resizable(False, False)
 
         # Styling
@@ -275,9 +85,31 @@ class BarcodeGeneratorApp:
         style.configure("TButton", font=("Segoe UI", 10))
         
         self.settings_file = "barcode_settings.json"
+        self.registry_file = "issued_codes.db"
         self._settings = {}
         self._load_settings()
 
+        # Scheduler callbacks arrive on worker threads; hand them to the Tk thread
+        self.scheduler = JobScheduler(
+            MAX_CONCURRENT_JOBS, callback=lambda job, event: self.root.after(0, self._on_job_event, job, event)
+        )
+        # Concurrent registry jobs would otherwise pick the same unissued codes
+        self._registry_lock = threading.Lock()
+        # Output file of every submitted job, to keep two jobs off the same file
+        self._job_paths = {}
+
+        # Live preview: settings changes are debounced, then the latest request
+        # is rendered on a background thread and only changed cells are redrawn
+        self._settings_after = None
+        self._preview = PagePreview()
+        self._preview_request = None
+        self._preview_cond = threading.Condition()
+        self._preview_transform = None
+        self._preview_grid = None
+        self._preview_cells = {}
+        threading.Thread(target=self._preview_worker, daemon=True).start()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
         self._build_ui()
 
     def _load_settings(self):
@@ -306,7 +138,16 @@ class BarcodeGeneratorApp:
                 "margin_right": self.margin_right_entry.get(),
                 "mode": self.mode_var.get(),
                 "start_code": self.start_entry.get(),
+                "seed": self.seed_entry.get(),
                 "draw_grid": self.grid_var.get(),
+                "vector": self.vector_var.get(),
+                "paper": self.paper_var.get(),
+                "gap": self.gap_entry.get(),
+                "rotate": self.rotate_var.get(),
+                "symbology": self._selected_symbology(),
+                "use_registry": self.registry_var.get(),
+                "copies": self.copies_entry.get(),
+                "collate": "sheet" if self.collate_var.get() else "label",
             }
             with open(self.settings_file, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2)
@@ -326,6 +167,8 @@ class BarcodeGeneratorApp:
             self.margin_bottom_entry: s.get("margin_bottom"),
             self.margin_left_entry: s.get("margin_left"),
             self.margin_right_entry: s.get("margin_right"),
+            self.gap_entry: s.get("gap"),
+            self.copies_entry: s.get("copies"),
         }
         for entry, value in entries.items():
             if value:
@@ -337,25 +180,73 @@ class BarcodeGeneratorApp:
         if s.get("start_code"):
             self.start_entry.delete(0, "end")
             self.start_entry.insert(0, s["start_code"])
+        if s.get("seed"):
+            self.seed_entry.insert(0, s["seed"])
         self.grid_var.set(s.get("draw_grid", True))
+        self.vector_var.set(s.get("vector", True))
+        if s.get("paper") in PAGE_SIZES or s.get("paper") in LABEL_TEMPLATES:
+            self.paper_var.set(s["paper"])
+        self.rotate_var.set(s.get("rotate", False))
+        self.symbology_var.set(SYMBOLOGY_NAMES.get(s.get("symbology"), SYMBOLOGY_NAMES["code128"]))
+        self.registry_var.set(s.get("use_registry", False))
+        self.collate_var.set(s.get("collate") == "sheet")
         self._toggle_mode()
-        self._update_layout_info()
 
     def _build_ui(self):
         # --- Title ---
         ttk.Label(self.root, text="Shtrix-kod PDF Generatori", style="Title.TLabel").pack(pady=(10, 5))
 
+        # --- First page preview ---
+        frame_preview = ttk.LabelFrame(self.root, text="Birinchi sahifa", padding=5)
+        frame_preview.pack(side="right", anchor="n", padx=(0, 15), pady=5)
+        self.preview_canvas = tk.Canvas(
+            frame_preview, width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1], background="#d9d9d9", highlightthickness=0
+        )
+        self.preview_canvas.pack()
+        self.preview_status = ttk.Label(frame_preview, text="", foreground="gray", wraplength=PREVIEW_SIZE[0])
+        self.preview_status.pack(fill="x", pady=(5, 0))
+
         # --- Basic settings ---
         frame_basic = ttk.LabelFrame(self.root, text="Asosiy sozlamalar", padding=10)
         frame_basic.pack(padx=15, pady=5, fill="x")
 
         self.count_entry = self._labeled_entry(frame_basic, "Kodlar soni:", "24")
-        self.count_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.count_entry.bind("<KeyRelease>", self._on_settings_changed)
         
-        self.cols_entry = self._labeled_entry(frame_basic, "Ustunlar soni:", "3")
-        self.cols_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.cols_entry = self._labeled_entry(frame_basic, "Ustunlar soni (0 = zich):", "3")
+        self.cols_entry.bind("<KeyRelease>", self._on_settings_changed)
+
+        frame_paper = ttk.Frame(frame_basic)
+        frame_paper.pack(fill="x", pady=2)
+        ttk.Label(frame_paper, text="Qog'oz / yorliq varag'i:", width=25, anchor="w").pack(side="left")
+        self.paper_var = tk.StringVar(value="A4")
+        paper_box = ttk.Combobox(
+            frame_paper, textvariable=self.paper_var, values=list(PAGE_SIZES) + list(LABEL_TEMPLATES),
+            state="readonly", width=15,
+        )
+        paper_box.pack(side="left", fill="x", expand=True)
+        paper_box.bind("<<ComboboxSelected>>", self._on_settings_changed)
+
+        self.gap_entry = self._labeled_entry(frame_basic, "Yorliqlar orasi (mm):", "0")
+        self.gap_entry.bind("<KeyRelease>", self._on_settings_changed)
+
+        self.rotate_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame_basic, text="Zich joylashda yorliqlarni burish mumkin", variable=self.rotate_var,
+            command=self._on_settings_changed,
+        ).pack(anchor="w")
 
         self.length_entry = self._labeled_entry(frame_basic, "Kod uzunligi:", "11")
+        self.length_entry.bind("<KeyRelease>", self._on_settings_changed)
+
+        self.copies_entry = self._labeled_entry(frame_basic, "Nusxalar soni:", "1")
+        self.copies_entry.bind("<KeyRelease>", self._on_settings_changed)
+
+        self.collate_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame_basic, text="Nusxalarni varaq bo'yicha terish", variable=self.collate_var,
+            command=self._on_settings_changed,
+        ).pack(anchor="w")
 
         self.layout_info = ttk.Label(frame_basic, text="Joylashuv: 3 ustun × 5 qator = 15 sahifada", foreground="blue")
         self.layout_info.pack(anchor="w", pady=(4, 0))
@@ -365,26 +256,26 @@ class BarcodeGeneratorApp:
         frame_size.pack(padx=15, pady=5, fill="x")
 
         self.barcode_width_entry = self._labeled_entry(frame_size, "Kenglik:", "40")
-        self.barcode_width_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.barcode_width_entry.bind("<KeyRelease>", self._on_settings_changed)
         
         self.barcode_height_entry = self._labeled_entry(frame_size, "Balandlik:", "20")
-        self.barcode_height_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.barcode_height_entry.bind("<KeyRelease>", self._on_settings_changed)
 
         # --- Page margins ---
         frame_margin = ttk.LabelFrame(self.root, text="Sahifa chegaralari (mm)", padding=10)
         frame_margin.pack(padx=15, pady=5, fill="x")
 
         self.margin_top_entry = self._labeled_entry(frame_margin, "Yuqori:", "5")
-        self.margin_top_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.margin_top_entry.bind("<KeyRelease>", self._on_settings_changed)
         
         self.margin_bottom_entry = self._labeled_entry(frame_margin, "Pastki:", "5")
-        self.margin_bottom_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.margin_bottom_entry.bind("<KeyRelease>", self._on_settings_changed)
         
         self.margin_left_entry = self._labeled_entry(frame_margin, "Chap:", "5")
-        self.margin_left_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.margin_left_entry.bind("<KeyRelease>", self._on_settings_changed)
         
         self.margin_right_entry = self._labeled_entry(frame_margin, "O'ng:", "5")
-        self.margin_right_entry.bind("<KeyRelease>", lambda e: self._update_layout_info())
+        self.margin_right_entry.bind("<KeyRelease>", self._on_settings_changed)
 
         # --- Mode selection ---
         frame_mode = ttk.LabelFrame(self.root, text="Shtrix-kod rejimi", padding=10)
@@ -402,15 +293,59 @@ class BarcodeGeneratorApp:
 
         self.start_entry = self._labeled_entry(frame_mode, "Boshlang'ich kod:", "0")
         self.start_entry.config(state="disabled")
+        self.start_entry.bind("<KeyRelease>", self._on_settings_changed)
+
+        self.seed_entry = self._labeled_entry(frame_mode, "Urug' (ixtiyoriy):", "")
+        self.seed_entry.bind("<KeyRelease>", self._on_settings_changed)
 
         # --- Grid option ---
         self.grid_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(self.root, text="To'r chiziqlar chizilsin", variable=self.grid_var).pack(anchor="w", padx=20, pady=5)
+        ttk.Checkbutton(
+            self.root, text="To'r chiziqlar chizilsin", variable=self.grid_var, command=self._on_settings_changed
+        ).pack(anchor="w", padx=20, pady=5)
+
+        # --- Render option ---
+        self.vector_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.root, text="Vektor chizish (tezkor, rasmsiz)", variable=self.vector_var).pack(anchor="w", padx=20, pady=(0, 5))
+
+        # --- Symbology ---
+        frame_symbology = ttk.Frame(self.root)
+        frame_symbology.pack(fill="x", padx=20, pady=(0, 5))
+        ttk.Label(frame_symbology, text="Shtrix-kod turi:", width=25, anchor="w").pack(side="left")
+        self.symbology_var = tk.StringVar(value=SYMBOLOGY_NAMES["code128"])
+        symbology_box = ttk.Combobox(
+            frame_symbology, textvariable=self.symbology_var, values=list(SYMBOLOGY_NAMES.values()),
+            state="readonly", width=15,
+        )
+        symbology_box.pack(side="left", fill="x", expand=True)
+        symbology_box.bind("<<ComboboxSelected>>", self._on_settings_changed)
+
+        # --- Issued code registry ---
+        self.registry_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.root, text="Oldin chiqarilgan kodlarni takrorlamaslik", variable=self.registry_var).pack(anchor="w", padx=20, pady=(0, 5))
 
         # --- Generate button ---
         self.btn_generate = ttk.Button(self.root, text="PDF yaratish", command=self._on_generate_clicked)
         self.btn_generate.pack(pady=10)
 
+        # --- Job queue ---
+        frame_jobs = ttk.LabelFrame(self.root, text="Ishlar navbati", padding=10)
+        frame_jobs.pack(padx=15, pady=5, fill="x")
+
+        self.jobs_tree = ttk.Treeview(frame_jobs, columns=("state", "progress"), height=3)
+        self.jobs_tree.heading("#0", text="Fayl")
+        self.jobs_tree.heading("state", text="Holat")
+        self.jobs_tree.heading("progress", text="Jarayon")
+        self.jobs_tree.column("#0", width=170)
+        self.jobs_tree.column("state", width=100)
+        self.jobs_tree.column("progress", width=70, anchor="e")
+        self.jobs_tree.pack(fill="x")
+
+        frame_job_buttons = ttk.Frame(frame_jobs)
+        frame_job_buttons.pack(fill="x", pady=(5, 0))
+        ttk.Button(frame_job_buttons, text="Pauza / Davom", command=self._on_pause_clicked).pack(side="left")
+        ttk.Button(frame_job_buttons, text="Bekor qilish", command=self._on_cancel_clicked).pack(side="left", padx=5)
+
         # --- Progress and status ---
         self.progress = ttk.Progressbar(self.root, length=300, mode="determinate")
         self.progress.pack(pady=5)
@@ -421,8 +356,8 @@ class BarcodeGeneratorApp:
         
         self._apply_settings()
 
-        # Initialize layout info
-        self._update_layout_info()
+        # Initialize layout info and preview
+        self._apply_settings_change()
 
     def _labeled_entry(self, parent, text, default=""):
         """Create a labeled entry widget."""
@@ -434,50 +369,255 @@ class BarcodeGeneratorApp:
         entry.pack(side="left", fill="x", expand=True)
         return entry
 
+    def _selected_symbology(self):
+        """SYMBOLOGIES key of the barcode type chosen in the combobox."""
+        name = self.symbology_var.get()
+        return next((key for key, label in SYMBOLOGY_NAMES.items() if label == name), "code128")
+
     def _toggle_mode(self):
         """Toggle the start code entry based on mode."""
         if self.mode_var.get() == "sequential":
             self.start_entry.config(state="normal")
         else:
             self.start_entry.config(state="disabled")
+        self._on_settings_changed()
+
+    def _on_settings_changed(self, event=None):
+        """Recompute layout info and preview once typing pauses, not on every key."""
+        if self._settings_after is not None:
+            self.root.after_cancel(self._settings_after)
+        self._settings_after = self.root.after(SETTINGS_DEBOUNCE_MS, self._apply_settings_change)
+
+    def _apply_settings_change(self):
+        if self._settings_after is not None:
+            self.root.after_cancel(self._settings_after)
+            self._settings_after = None
+        self._update_layout_info()
+        self._request_preview()
+
+    def _paper_options(self):
+        """Page size, label template, gaps and rotation for page_layout()."""
+        paper = self.paper_var.get()
+        gap = float(self.gap_entry.get() or 0) * mm
+        return {
+            "page_size": PAGE_SIZES.get(paper, PAGE_SIZES["A4"]),
+            "template": paper if paper in LABEL_TEMPLATES else None,
+            "gap_x": gap,
+            "gap_y": gap,
+            "rotate": self.rotate_var.get(),
+        }
+
+    def _layout_options(self):
+        """Columns (None for dense packing) and page_layout() options; ValueError while half-typed."""
+        cols = int(self.cols_entry.get()) or None
+        options = dict(
+            margin_top=float(self.margin_top_entry.get()) * mm,
+            margin_bottom=float(self.margin_bottom_entry.get()) * mm,
+            margin_left=float(self.margin_left_entry.get()) * mm,
+            margin_right=float(self.margin_right_entry.get()) * mm,
+            barcode_width=float(self.barcode_width_entry.get()) * mm,
+            barcode_height=float(self.barcode_height_entry.get()) * mm,
+            **self._paper_options(),
+        )
+        return cols, options
 
     def _update_layout_info(self):
-        """Update the layout information label."""
+        """Show the exact page layout, page count and paper usage of the current settings."""
         try:
-            cols = int(self.cols_entry.get())
-            barcode_width = float(self.barcode_width_entry.get()) * mm
-            barcode_height = float(self.barcode_height_entry.get()) * mm
-            margin_top = float(self.margin_top_entry.get()) * mm
-            margin_bottom = float(self.margin_bottom_entry.get()) * mm
-            margin_left = float(self.margin_left_entry.get()) * mm
-            margin_right = float(self.margin_right_entry.get()) * mm
-            
-            rows = calculate_max_rows(
-                cols,
-                base_barcode_width=barcode_width,
-                base_barcode_height=barcode_height,
-                page_margin_top=margin_top,
-                page_margin_bottom=margin_bottom,
-                page_margin_left=margin_left,
-                page_margin_right=margin_right
-            )
-            per_page = cols * rows
-            self.layout_info.config(
-                text=f"Joylashuv: {cols} ustun × {rows} qator = {per_page} sahifada",
-                foreground="blue"
-            )
-            
-        except (ValueError, ZeroDivisionError):
-            pass
+            count = int(self.count_entry.get())
+            copies = int(self.copies_entry.get())
+            cols, options = self._layout_options()
+        except ValueError:
+            # Ignore half-typed numbers
+            return
+
+        try:
+            layout = page_layout(cols, **options)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            self.layout_info.config(text="Yorliq sahifaga sig'maydi", foreground="red")
+            return
+
+        usage = paper_usage(layout, count, copies, "sheet" if self.collate_var.get() else "label")
+        text = f"Joylashuv: {layout['cols']} ustun × {layout['rows']} qator = {layout['per_page']} sahifada"
+        if layout["rotated"]:
+            text += f" ({layout['rotated']} tasi burilgan)"
+        labels = f"{count} ta kod" if copies == 1 else f"{count} ta kod × {copies} nusxa"
+        text += f"\n{labels}: {usage['pages']} sahifa, qog'oz {usage['usage']:.0%} band"
+        self.layout_info.config(text=text, foreground="blue")
+
+    def _request_preview(self):
+        """Hand the current settings to the preview thread, replacing any pending request."""
+        try:
+            cols, options = self._layout_options()
+            mode = self.mode_var.get()
+            request = {
+                "cols": cols,
+                "options": options,
+                "count": int(self.count_entry.get()),
+                "copies": int(self.copies_entry.get()),
+                "collate": "sheet" if self.collate_var.get() else "label",
+                "mode": mode,
+                "start_code": self.start_entry.get() if mode == "sequential" else None,
+                "code_length": int(self.length_entry.get()),
+                "seed": self.seed_entry.get().strip() or PREVIEW_SEED,
+                "symbology": self._selected_symbology(),
+                "draw_grid": self.grid_var.get(),
+            }
+        except ValueError:
+            return
+        problem = self._preview_problem(request)
+        if problem:
+            self._show_preview_error(problem)
+            return
+        with self._preview_cond:
+            self._preview_request = request
+            self._preview_cond.notify()
+
+    @staticmethod
+    def _preview_problem(request):
+        """Why the preview cannot draw request (e.g. "1e999" mm margins), or None."""
+        options = request["options"]
+        sizes = [options["barcode_width"], options["barcode_height"]]
+        spaces = [options[f"margin_{side}"] for side in ("top", "bottom", "left", "right")]
+        spaces += [options["gap_x"], options["gap_y"]]
+        if not all(math.isfinite(value) for value in sizes + spaces):
+            return "o'lchamlar chekli son bo'lishi kerak"
+        if min(sizes) <= 0 or min(spaces) < 0:
+            return "o'lchamlar musbat bo'lishi kerak"
+        if request["count"] < 0 or request["copies"] < 1 or request["code_length"] < 1:
+            return "kodlar soni, nusxalar va kod uzunligi musbat bo'lishi kerak"
+        return None
+
+    def _preview_worker(self):
+        """Background thread: render the latest preview request."""
+        while True:
+            with self._preview_cond:
+                while self._preview_request is None:
+                    self._preview_cond.wait()
+                request, self._preview_request = self._preview_request, None
+            try:
+                self._render_preview(request)
+            except Exception as e:
+                # Whatever the settings, the thread must survive to draw the next ones
+                self.root.after(0, self._show_preview_error, str(e) or type(e).__name__)
+
+    def _render_preview(self, request):
+        """Draw the first page through the vector path, posting cells to Tk in batches."""
+        layout = self._preview.layout(request["cols"], **request["options"])
+        count = max(0, min(request["count"], layout["per_page"]))
+        # Only the first page is generated, so the cost never depends on the job size
+        codes = generate_unique_barcodes(
+            count, request["mode"], request["start_code"], request["code_length"], seed=request["seed"]
+        ) if count else []
+        if codes:
+            labels = copy_labels(codes, request["copies"], request["collate"], layout["per_page"])
+            # Padding of a short sheet's copies stays blank
+            codes = [label for label in itertools.islice(labels, layout["per_page"]) if label is not None]
+        grid = self._preview.grid(layout, request["draw_grid"], len(codes))
+        self.root.after(0, self._draw_preview_page, layout["page_size"], grid, len(codes))
+
+        batch = []
+        deadline = time.perf_counter() + PREVIEW_BATCH_SECONDS
+        for index, code in enumerate(codes):
+            if self._preview_request is not None:
+                # Superseded by newer settings
+                return
+            key = self._preview.cell_key(layout, index, code, request["symbology"])
+            batch.append((index, key, self._preview.cell(layout, index, code, request["symbology"])))
+            if time.perf_counter() >= deadline:
+                self.root.after(0, self._draw_preview_cells, batch)
+                batch = []
+                deadline = time.perf_counter() + PREVIEW_BATCH_SECONDS
+        if batch:
+            self.root.after(0, self._draw_preview_cells, batch)
+
+    def _show_preview_error(self, message):
+        self.preview_status.config(text=f"Ko'rsatib bo'lmaydi: {message}", foreground="red")
+
+    def _draw_preview_page(self, page_size, grid, cell_count):
+        """Fit the page into the preview canvas; redraw the grid only if it changed."""
+        canvas = self.preview_canvas
+        width, height = PREVIEW_SIZE
+        page_width, page_height = page_size
+        scale = min((width - 10) / page_width, (height - 10) / page_height)
+        transform = (scale, (width - page_width * scale) / 2, (height - page_height * scale) / 2, page_height)
+        if transform != self._preview_transform:
+            # New page geometry: nothing drawn so far is in the right place
+            canvas.delete("all")
+            self._preview_transform = transform
+            self._preview_grid = None
+            self._preview_cells = {}
+            left, top = self._preview_point(0, page_height)
+            right, bottom = self._preview_point(page_width, 0)
+            canvas.create_rectangle(left, top, right, bottom, fill="white", outline="gray")
+        if grid != self._preview_grid:
+            canvas.delete("grid")
+            self._draw_preview_items(grid, "grid")
+            self._preview_grid = grid
+        for index in [index for index in self._preview_cells if index >= cell_count]:
+            canvas.delete(f"cell{index}")
+            del self._preview_cells[index]
+        self.preview_status.config(text=f"Birinchi sahifada {cell_count} ta yorliq", foreground="gray")
+
+    def _draw_preview_cells(self, batch):
+        """Redraw the cells whose content changed since the last preview."""
+        for index, key, items in batch:
+            if self._preview_cells.get(index) == key:
+                continue
+            self.preview_canvas.delete(f"cell{index}")
+            self._draw_preview_items(items, f"cell{index}")
+            self._preview_cells[index] = key
+
+    def _preview_point(self, x, y):
+        """Page point (origin bottom left) to preview canvas pixel."""
+        scale, offset_x, offset_y, page_height = self._preview_transform
+        return offset_x + x * scale, offset_y + (page_height - y) * scale
+
+    def _draw_preview_items(self, items, tag):
+        """Draw PreviewCanvas primitives onto the Tk canvas."""
+        canvas = self.preview_canvas
+        scale = self._preview_transform[0]
+        for item in items:
+            if item[0] == "rect":
+                _, x0, y0, x1, y1, fill, dashed = item
+                left, top = self._preview_point(x0, y1)
+                right, bottom = self._preview_point(x1, y0)
+                if fill:
+                    canvas.create_rectangle(left, top, right, bottom, fill="black", outline="", tags=tag)
+                else:
+                    canvas.create_rectangle(
+                        left, top, right, bottom, outline="#a0a0a0", dash=(2, 2) if dashed else "", tags=tag
+                    )
+            else:
+                _, x, y, text, size, angle = item
+                px, py = self._preview_point(x, y)
+                canvas.create_text(
+                    px, py, text=text, anchor="s", angle=angle,
+                    font=("Helvetica", -max(1, round(size * scale))), tags=tag,
+                )
 
     def _validate_inputs(self):
         """Validate all input fields."""
         try:
-            
+            cols = int(self.cols_entry.get())
+            if not (0 <= cols <= 20):
+                messagebox.showerror("Xatolik", "Ustunlar soni 0 va 20 orasida bo'lishi kerak!")
+                return False
+
+            gap = float(self.gap_entry.get() or 0)
+            if not (0 <= gap <= 50):
+                messagebox.showerror("Xatolik", "Yorliqlar orasi 0 va 50 mm orasida bo'lishi kerak!")
+                return False
+
             code_length = int(self.length_entry.get())
             if not (4 <= code_length <= 20):
                 messagebox.showerror("Xatolik", "Kod uzunligi 4 va 20 orasida bo'lishi kerak!")
                 return False
+
+            copies = int(self.copies_entry.get())
+            if not (1 <= copies <= 100):
+                messagebox.showerror("Xatolik", "Nusxalar soni 1 va 100 orasida bo'lishi kerak!")
+                return False
             
             barcode_width = float(self.barcode_width_entry.get())
             if not (10 <= barcode_width <= 200):
@@ -528,25 +668,73 @@ class BarcodeGeneratorApp:
         if not pdf_path:
             return
         
-        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
-        
         self._save_settings()
 
         self._generate_pdf(pdf_path)
 
     def _on_close(self):
+        """Save settings; cancel unfinished jobs and close once they have stopped."""
         self._save_settings()
-        self.root.destroy()
+        if not self.scheduler.active():
+            self.root.destroy()
+            return
+        if not messagebox.askyesno("Chiqish", "Ishlar hali tugamagan. Ularni bekor qilib chiqilsinmi?"):
+            return
+        self.scheduler.shutdown(cancel=True, wait=False)
+        self.status.config(text="Ishlar to'xtatilmoqda...", foreground="gray")
+        self._close_when_idle()
+
+    def _close_when_idle(self):
+        # Jobs stop after their current page; waiting here instead of joining keeps Tk responsive
+        if self.scheduler.active():
+            self.root.after(100, self._close_when_idle)
+        else:
+            self.root.destroy()
+
+    def _selected_job_ids(self):
+        return [int(iid) for iid in self.jobs_tree.selection()]
+
+    def _on_pause_clicked(self):
+        """Pause the selected jobs, or resume them if they are paused."""
+        for job_id in self._selected_job_ids():
+            if self.scheduler.jobs[job_id].state == "paused":
+                self.scheduler.resume(job_id)
+            else:
+                self.scheduler.pause(job_id)
+
+    def _on_cancel_clicked(self):
+        for job_id in self._selected_job_ids():
+            self.scheduler.cancel(job_id)
+
+    def _job_for_path(self, pdf_path):
+        """The queued, running or paused job writing pdf_path, if any."""
+        key = os.path.normcase(os.path.abspath(pdf_path))
+        return next((job for job in self.scheduler.active() if self._job_paths.get(job.id) == key), None)
 
     def _generate_pdf(self, pdf_path):
-        """Generate the PDF in a separate thread."""
+        """Queue a PDF generation job with the current settings."""
+        busy = self._job_for_path(pdf_path)
+        if busy is not None:
+            # Both jobs would write the same checkpoint and output
+            messagebox.showerror(
+                "Xatolik",
+                f"\"{busy.name}\" fayli hali yaratilmoqda. Tugashini kuting yoki boshqa fayl nomini tanlang.",
+            )
+            return
         try:
             count = int(self.count_entry.get())
-            cols = int(self.cols_entry.get())
+            cols = int(self.cols_entry.get()) or None
+            paper_options = self._paper_options()
             code_length = int(self.length_entry.get())
+            copies = int(self.copies_entry.get())
+            collate = "sheet" if self.collate_var.get() else "label"
             draw_grid = self.grid_var.get()
+            render = "vector" if self.vector_var.get() else "raster"
+            symbology = self._selected_symbology()
             mode = self.mode_var.get()
             start_code = self.start_entry.get() if mode == "sequential" else None
+            seed = self.seed_entry.get().strip() or None
+            registry_file = self.registry_file if self.registry_var.get() else None
             
             barcode_width = float(self.barcode_width_entry.get()) * mm
             barcode_height = float(self.barcode_height_entry.get()) * mm
@@ -555,9 +743,6 @@ class BarcodeGeneratorApp:
             margin_left = float(self.margin_left_entry.get()) * mm
             margin_right = float(self.margin_right_entry.get()) * mm
 
-            self.progress["value"] = 0
-            self.btn_generate.config(state="disabled")
-            
             mode_names = {
                 "random_digits": "tasodifiy raqamlar",
                 "random_alphanumeric": "tasodifiy harf-raqamlar",
@@ -565,45 +750,83 @@ class BarcodeGeneratorApp:
                 "sequential": "ketma-ket"
             }
             mode_text = mode_names.get(mode, "noma'lum")
-            self.status.config(text=f"{mode_text} shtrix-kodlar yaratilmoqda...", foreground="blue")
-
-            def task():
-                try:
-                    pdf_result_path = save_barcodes_to_pdf(
-                        count, cols,
-                        pdf_name=os.path.basename(pdf_path),
-                        draw_grid=draw_grid,
-                        mode=mode,
-                        start_code=start_code,
-                        code_length=code_length,
-                        margin_top=margin_top,
-                        margin_bottom=margin_bottom,
-                        margin_left=margin_left,
-                        margin_right=margin_right,
-                        barcode_width=barcode_width,
-                        barcode_height=barcode_height,
-                        progress_callback=lambda p: self.root.after(0, self._update_progress, p)
-                    )
-                    shutil.move(pdf_result_path, pdf_path)
-                    self.root.after(0, self._on_generation_complete, pdf_path)
-
-                except Exception as e:
-                    error_text = f"{type(e).__name__}: {str(e)}"
-                    self.root.after(0, self._on_generation_error, error_text)
-
-            threading.Thread(target=task, daemon=True).start()
+            self.status.config(text=f"{mode_text} shtrix-kodlar navbatga qo'shildi", foreground="blue")
+
+            def task(monitor):
+                registry_lock = self._registry_lock if registry_file else contextlib.nullcontext()
+                with registry_lock:
+                    # SQLite connections belong to the thread that opened them
+                    registry = CodeRegistry(registry_file) if registry_file else None
+                    try:
+                        # Checkpointed next to its destination and renamed into place when
+                        # complete; generating the same file again after a crash resumes it
+                        return save_barcodes_to_pdf(
+                            count, cols,
+                            pdf_name=pdf_path,
+                            draw_grid=draw_grid,
+                            mode=mode,
+                            start_code=start_code,
+                            code_length=code_length,
+                            margin_top=margin_top,
+                            margin_bottom=margin_bottom,
+                            margin_left=margin_left,
+                            margin_right=margin_right,
+                            barcode_width=barcode_width,
+                            barcode_height=barcode_height,
+                            **paper_options,
+                            render=render,
+                            symbology=symbology,
+                            copies=copies,
+                            collate=collate,
+                            workers=None,
+                            seed=seed,
+                            registry=registry,
+                            monitor=monitor,
+                        )
+                    finally:
+                        if registry is not None:
+                            registry.close()
+
+            job = self.scheduler.submit(task, name=os.path.basename(pdf_path))
+            self._job_paths[job.id] = os.path.normcase(os.path.abspath(pdf_path))
 
         except Exception as e:
             messagebox.showerror("Xatolik", f"{type(e).__name__}: {str(e)}")
 
-    def _update_progress(self, value):
-        """Update the progress bar."""
+    def _on_job_event(self, job, event):
+        """Show a job's state changes, page progress, speed and remaining time."""
+        iid = str(job.id)
+        if event["type"] == "state":
+            state = event["state"]
+            if self.jobs_tree.exists(iid):
+                self.jobs_tree.set(iid, "state", JOB_STATE_NAMES[state])
+            else:
+                self.jobs_tree.insert("", "end", iid=iid, text=job.name, values=(JOB_STATE_NAMES[state], "0%"))
+            if state == "done":
+                self.jobs_tree.set(iid, "progress", "100%")
+                self._on_generation_complete(job.result)
+            elif state == "failed":
+                self._on_generation_error(f"{type(job.error).__name__}: {str(job.error)}")
+            elif state == "cancelled":
+                self.progress["value"] = 0
+                self.status.config(text=f"Bekor qilindi: {job.name}", foreground="gray")
+            return
+
+        if event["type"] != "page" or not event["total"]:
+            return
+        value = int(event["items_done"] / event["total"] * 100)
+        self.jobs_tree.set(iid, "progress", f"{value}%")
         self.progress["value"] = value
-        self.status.config(text=f"Jarayon: {value}%", foreground="blue")
+        text = f"Jarayon: {value}%"
+        if event["items_per_sec"]:
+            text += f" · {event['items_per_sec']:.0f} kod/s"
+        if event["eta"] is not None:
+            eta = int(event["eta"])
+            text += f" · ~{eta // 60:02d}:{eta % 60:02d} qoldi"
+        self.status.config(text=text, foreground="blue")
 
     def _on_generation_complete(self, pdf_path):
         """Handle successful PDF generation."""
-        self.btn_generate.config(state="normal")
         self.progress["value"] = 100
         self.status.config(text="Tayyor!", foreground="green")
         
@@ -620,7 +843,6 @@ class BarcodeGeneratorApp:
 
     def _on_generation_error(self, error_text):
         """Handle generation errors."""
-        self.btn_generate.config(state="normal")
         self.progress["value"] = 0
         self.status.config(text="Xatolik", foreground="red")
         messagebox.showerror("Xatolik", error_text)
@@ -634,4 +856,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed for the process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,479 @@
+"""Local HTTP service for barcode PDF generation.
+
+    python server.py --port 8765
+
+POST /generate with a JSON job spec using the GUI's settings fields (the keys
+of barcode_settings.json) and the PDF comes back as the response body:
+
+    curl -d '{"count": 48, "seed": "batch-7"}' http://127.0.0.1:8765/generate -o labels.pdf
+
+Jobs run in a process pool. Specs that always produce the same PDF (seeded or
+sequential codes without the registry) are cached on disk by spec hash, so a
+repeated request is served straight from the cache. GET /health reports the
+pool and cache state.
+"""
+
+import os
+import sys
+import json
+import uuid
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from reportlab.lib.units import mm
+
+from barcode_gen import COLLATE_MODES, LABEL_TEMPLATES, PAGE_SIZES, SYMBOLOGIES, CodeRegistry, save_barcodes_to_pdf
+
+# Field defaults of the GUI (numbers are saved as entry strings)
+SPEC_DEFAULTS = {
+    "count": "24",
+    "cols": "3",
+    "code_length": "11",
+    "barcode_width": "40",
+    "barcode_height": "20",
+    "margin_top": "5",
+    "margin_bottom": "5",
+    "margin_left": "5",
+    "margin_right": "5",
+    "mode": "random_digits",
+    "start_code": "0",
+    "seed": "",
+    "draw_grid": True,
+    "vector": True,
+    "paper": "A4",
+    "gap": "0",
+    "rotate": False,
+    "symbology": "code128",
+    "use_registry": False,
+    "copies": "1",
+    "collate": "label",
+}
+
+MODES = ("random_digits", "random_alphanumeric", "random_full", "sequential")
+
+# Larger jobs belong to the command line, which can roll over files
+MAX_COUNT = 100000
+MAX_SPEC_BYTES = 64 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Bump when rendering changes so old cached PDFs are not served
+CACHE_VERSION = 1
+
+
+class ServiceBusy(Exception):
+    """Raised when max_pending jobs are already queued or running."""
+
+
+def normalize_spec(spec: dict) -> dict:
+    """
+    Validate a job spec and fill in the GUI defaults.
+
+    Values may be given as saved by the GUI (numbers as strings) or as JSON
+    numbers. Raises ValueError for unknown fields and out of range values.
+
+    Returns:
+        Spec with typed values; start_code and seed are None when unused
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("Job spec must be a JSON object")
+    unknown = set(spec) - set(SPEC_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    fields = dict(SPEC_DEFAULTS, **spec)
+
+    def number(name, kind, low, high):
+        try:
+            value = kind(fields[name])
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number") from None
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}")
+        return value
+
+    result = {
+        "count": number("count", int, 1, MAX_COUNT),
+        "cols": number("cols", int, 0, 20),
+        "code_length": number("code_length", int, 4, 20),
+        "barcode_width": number("barcode_width", float, 10, 200),
+        "barcode_height": number("barcode_height", float, 5, 100),
+    }
+    for side in ("top", "bottom", "left", "right"):
+        result[f"margin_{side}"] = number(f"margin_{side}", float, 0, 50)
+    result["gap"] = number("gap", float, 0, 50)
+
+    if fields["paper"] not in PAGE_SIZES and fields["paper"] not in LABEL_TEMPLATES:
+        raise ValueError(f"paper must be one of: {', '.join(list(PAGE_SIZES) + list(LABEL_TEMPLATES))}")
+    result["paper"] = fields["paper"]
+
+    if fields["mode"] not in MODES:
+        raise ValueError(f"mode must be one of: {', '.join(MODES)}")
+    result["mode"] = fields["mode"]
+    result["start_code"] = None
+    if result["mode"] == "sequential":
+        result["start_code"] = str(fields["start_code"])
+        if not result["start_code"].isdigit():
+            raise ValueError("start_code must consist of digits in sequential mode")
+    result["seed"] = str(fields["seed"]).strip() or None
+    if fields["symbology"] not in SYMBOLOGIES:
+        raise ValueError(f"symbology must be one of: {', '.join(SYMBOLOGIES)}")
+    result["symbology"] = fields["symbology"]
+    result["copies"] = number("copies", int, 1, 100)
+    if result["count"] * result["copies"] > MAX_COUNT:
+        raise ValueError(f"count * copies must not exceed {MAX_COUNT}")
+    if fields["collate"] not in COLLATE_MODES:
+        raise ValueError(f"collate must be one of: {', '.join(COLLATE_MODES)}")
+    result["collate"] = fields["collate"]
+
+    for flag in ("draw_grid", "vector", "rotate", "use_registry"):
+        if not isinstance(fields[flag], bool):
+            raise ValueError(f"{flag} must be true or false")
+        result[flag] = fields[flag]
+    return result
+
+
+def is_deterministic(spec: dict) -> bool:
+    """Whether the spec always yields the same PDF and may be served from the cache."""
+    return not spec["use_registry"] and (spec["seed"] is not None or spec["mode"] == "sequential")
+
+
+def spec_hash(spec: dict) -> str:
+    text = json.dumps([CACHE_VERSION, spec], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _run_job(spec, pdf_path, registry_path):
+    """Process pool entry point: render a normalized spec to pdf_path."""
+    registry = CodeRegistry(registry_path) if spec["use_registry"] else None
+    part_path = f"{pdf_path}.{os.getpid()}.part"
+    try:
+        save_barcodes_to_pdf(
+            spec["count"],
+            spec["cols"] or None,
+            pdf_name=part_path,
+            draw_grid=spec["draw_grid"],
+            mode=spec["mode"],
+            start_code=spec["start_code"],
+            code_length=spec["code_length"],
+            margin_top=spec["margin_top"] * mm,
+            margin_bottom=spec["margin_bottom"] * mm,
+            margin_left=spec["margin_left"] * mm,
+            margin_right=spec["margin_right"] * mm,
+            barcode_width=spec["barcode_width"] * mm,
+            barcode_height=spec["barcode_height"] * mm,
+            page_size=PAGE_SIZES.get(spec["paper"], PAGE_SIZES["A4"]),
+            template=spec["paper"] if spec["paper"] in LABEL_TEMPLATES else None,
+            gap_x=spec["gap"] * mm,
+            gap_y=spec["gap"] * mm,
+            rotate=spec["rotate"],
+            render="vector" if spec["vector"] else "raster",
+            symbology=spec["symbology"],
+            copies=spec["copies"],
+            collate=spec["collate"],
+            workers=1,
+            seed=spec["seed"],
+            registry=registry,
+        )
+        # Readers only ever see complete files
+        os.replace(part_path, pdf_path)
+    finally:
+        if registry is not None:
+            registry.close()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    return pdf_path
+
+
+class GenerationService:
+    """
+    Runs job specs in a process pool and keeps a disk cache of their PDFs.
+
+    At most max_pending jobs are queued or running at once; further requests
+    fail with ServiceBusy instead of piling up. Identical deterministic specs
+    requested while one is running share that job. The cache is trimmed to
+    cache_bytes, least recently used files first; files that are still being
+    generated or sent are never evicted, so call release() on every file
+    generate() returns.
+    """
+
+    def __init__(
+        self,
+        workers=None,
+        cache_dir=None,
+        cache_bytes=512 * 2**20,
+        max_pending=64,
+        registry_path="issued_codes.db",
+    ):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.own_cache_dir = cache_dir is None
+        self.cache_dir = cache_dir or tempfile.mkdtemp(prefix="barcode_service_")
+        self.scratch_dir = os.path.join(self.cache_dir, "tmp")
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        self.cache_bytes = cache_bytes
+        self.registry_path = registry_path
+        self.hits = 0
+        self.misses = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        # Reentrant: done-callbacks run synchronously when a future is already finished
+        self._lock = threading.RLock()
+        self._running = {}
+        # Cache key -> requests generating or sending that file; never trimmed
+        self._pins = {}
+        # Concurrent registry jobs would otherwise pick the same unissued codes
+        self._registry_lock = threading.Lock()
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self.own_cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        files = [name for name in os.listdir(self.cache_dir) if name.endswith(".pdf")]
+        return {
+            "pending": self._pending,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_entries": len(files),
+            "cache_bytes": sum(os.path.getsize(os.path.join(self.cache_dir, name)) for name in files),
+        }
+
+    def _submit(self, spec, pdf_path):
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy()
+        with self._lock:
+            self._pending += 1
+        future = self.pool.submit(_run_job, spec, pdf_path, self.registry_path)
+
+        def release(_):
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+        future.add_done_callback(release)
+        return future
+
+    def generate(self, spec: dict):
+        """
+        Run (or look up) a job and open its PDF.
+
+        Args:
+            spec: Job spec as accepted by normalize_spec()
+
+        Returns:
+            (file, cached, temporary): the open PDF, whether it came from the
+            cache, and whether the caller must delete it after reading
+        """
+        spec = normalize_spec(spec)
+
+        if not is_deterministic(spec):
+            pdf_path = os.path.join(self.scratch_dir, f"{uuid.uuid4().hex}.pdf")
+            with self._lock:
+                self.misses += 1
+            if spec["use_registry"]:
+                with self._registry_lock:
+                    self._submit(spec, pdf_path).result()
+            else:
+                self._submit(spec, pdf_path).result()
+            return open(pdf_path, "rb"), False, True
+
+        key = spec_hash(spec)
+        pdf_path = os.path.join(self.cache_dir, f"{key}.pdf")
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+            try:
+                f = open(pdf_path, "rb")
+            except FileNotFoundError:
+                f = None
+            if f is not None:
+                self.hits += 1
+                os.utime(pdf_path)
+                return f, True, False
+            self.misses += 1
+            try:
+                future = self._running.get(key)
+                if future is None:
+                    future = self._submit(spec, pdf_path)
+                    self._running[key] = future
+                    future.add_done_callback(lambda _: self._finish(key))
+            except BaseException:
+                self._unpin(key)
+                raise
+
+        try:
+            future.result()
+            f = open(pdf_path, "rb")
+        except BaseException:
+            with self._lock:
+                self._unpin(key)
+            raise
+        # The new file is pinned and open: trimming now cannot take it away
+        with self._lock:
+            self._trim_cache()
+        return f, False, False
+
+    def release(self, f):
+        """Close a file returned by generate() and let the cache evict it again."""
+        f.close()
+        directory, name = os.path.split(f.name)
+        if directory != self.cache_dir:
+            return
+        with self._lock:
+            self._unpin(name[: -len(".pdf")])
+            self._trim_cache()
+
+    def _unpin(self, key):
+        self._pins[key] -= 1
+        if not self._pins[key]:
+            del self._pins[key]
+
+    def _finish(self, key):
+        with self._lock:
+            self._running.pop(key, None)
+
+    def _trim_cache(self):
+        """Evict unpinned files, oldest first, until the cache fits cache_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pdf"):
+                st = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.cache_bytes:
+                break
+            key = name[: -len(".pdf")]
+            if key in self._pins or key in self._running:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                # Still being sent on Windows; it goes on a later trim
+                continue
+            total -= size
+
+
+class GenerationHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    quiet = False
+
+    @property
+    def service(self) -> GenerationService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, dict(status="ok", **self.service.stats()))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "invalid Content-Length"})
+            self.close_connection = True
+            return
+        if length > MAX_SPEC_BYTES:
+            self._send_json(413, {"error": "job spec too large"})
+            self.close_connection = True
+            return
+        try:
+            spec = json.loads(self.rfile.read(length) or b"{}")
+            f, cached, temporary = self.service.generate(spec)
+        except ServiceBusy:
+            self._send_json(503, {"error": "too many jobs, retry later"}, {"Retry-After": "1"})
+            return
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        try:
+            size = os.fstat(f.fileno()).st_size
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(size))
+            self.send_header("X-Cache", "hit" if cached else "miss")
+            self.end_headers()
+            # Sent from disk in chunks; a PDF is never held in memory whole
+            shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+        finally:
+            self.service.release(f)
+            if temporary:
+                os.remove(f.name)
+
+
+def make_server(host="127.0.0.1", port=8765, service=None, quiet=False) -> ThreadingHTTPServer:
+    """Create the HTTP server; port=0 picks a free port (see server.server_address)."""
+    handler = type("Handler", (GenerationHandler,), {"quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.service = service or GenerationService()
+    return server
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve barcode PDF generation over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", help="keep cached PDFs here across restarts (default: a temporary directory)")
+    parser.add_argument("--cache-size", type=int, default=512, help="cache limit in MiB (default: 512)")
+    parser.add_argument("--max-pending", type=int, default=64, help="jobs queued or running before requests get 503")
+    parser.add_argument("--registry", default="issued_codes.db", help="registry used by specs with use_registry")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not log requests")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    service = GenerationService(
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        cache_bytes=args.cache_size * 2**20,
+        max_pending=args.max_pending,
+        registry_path=args.registry,
+    )
+    server = make_server(args.host, args.port, service, args.quiet)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    # Needed for the process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,599 @@
+"""Barcode symbologies: check characters and encoders to a common module layout.
+
+Every encoder turns a code into a Symbol, the dark rectangles of the barcode
+in module units, which barcode_gen draws as vectors or rasterizes the same
+way for every symbology. Encoders are looked up by name in SYMBOLOGIES; new
+ones can be added with register_symbology().
+
+Like barcode_gen, this module imports no imaging libraries at load time.
+"""
+
+import string
+import functools
+from collections import namedtuple
+
+# Check character schemes of sequential mode
+CHECK_SCHEMES = ("mod10", "gs1", "mod43")
+
+# Code 39 character values used by the mod-43 check character
+MOD43_CHARSET = string.digits + string.ascii_uppercase + "-. $/+%"
+
+
+def check_weight(values, position: int, scheme: str):
+    """
+    Contribution of character values to a check sum.
+
+    Works on ints and NumPy arrays alike. position counts from the rightmost
+    payload character (0), i.e. the one next to the check character.
+    """
+    if scheme == "mod43" or position % 2:
+        return values
+    if scheme == "gs1":
+        return values * 3
+    # mod10 (Luhn): double, and add the two digits of the result
+    doubled = values * 2
+    return doubled - 9 * (doubled > 9)
+
+
+def check_character(payload: str, scheme: str) -> str:
+    """
+    Compute the check character appended to payload.
+
+    Args:
+        payload: Code without its check character
+        scheme: "mod10" (Luhn), "gs1" (GTIN/SSCC weights 3-1) or "mod43" (Code 39)
+
+    Raises:
+        ValueError: If the scheme is unknown or payload has characters it cannot weigh
+    """
+    if scheme not in CHECK_SCHEMES:
+        raise ValueError(f"Unknown check digit scheme: {scheme}")
+    if scheme == "mod43":
+        if any(ch not in MOD43_CHARSET for ch in payload):
+            raise ValueError(f"{payload!r} has characters outside the mod-43 (Code 39) set")
+        values = [MOD43_CHARSET.index(ch) for ch in payload]
+    else:
+        if not (payload.isascii() and payload.isdigit()):
+            raise ValueError(f"{scheme} check digits need a numeric code, got {payload!r}")
+        values = [int(ch) for ch in payload]
+
+    total = sum(check_weight(value, pos, scheme) for pos, value in enumerate(reversed(values)))
+    if scheme == "mod43":
+        return MOD43_CHARSET[total % 43]
+    return str(-total % 10)
+
+
+# An encoded barcode. rects are the dark (x, y, width, height) areas in
+# modules, y growing downwards from the top. Linear symbols are one module
+# high (the bar height); two_d symbols have square modules and include their
+# quiet zone. text is the human-readable line printed under the symbol.
+Symbol = namedtuple("Symbol", "rects width height text two_d")
+
+
+def _dark_runs(modules) -> list:
+    """(start, width) of every run of dark (truthy) modules."""
+    runs = []
+    start = None
+    for i, dark in enumerate(modules):
+        if dark:
+            if start is None:
+                start = i
+        elif start is not None:
+            runs.append((start, i - start))
+            start = None
+    if start is not None:
+        runs.append((start, len(modules) - start))
+    return runs
+
+
+def _linear_symbol(pattern: str, text: str) -> Symbol:
+    """Symbol for a pattern of "1" (bar) and "0" (space) modules."""
+    runs = _dark_runs([module == "1" for module in pattern])
+    return Symbol([(start, 0, width, 1) for start, width in runs], len(pattern), 1, text, False)
+
+
+def _matrix_symbol(rows, text: str, quiet: int) -> Symbol:
+    """Symbol for rows of dark/light modules, framed by a quiet zone of quiet modules."""
+    rects = []
+    for y, row in enumerate(rows):
+        rects.extend((quiet + start, quiet + y, width, 1) for start, width in _dark_runs(row))
+    return Symbol(rects, len(rows[0]) + 2 * quiet, len(rows) + 2 * quiet, text, True)
+
+
+# Bar and space widths (in modules) of the Code128 symbol values 0-106
+_CODE128_PATTERNS = (
+    "212222 222122 222221 121223 121322 131222 122213 122312 132212 221213 221312 231212 112232 122132 122231 "
+    "113222 123122 123221 223211 221132 221231 213212 223112 312131 311222 321122 321221 312212 322112 322211 "
+    "212123 212321 232121 111323 131123 131321 112313 132113 132311 211313 231113 231311 112133 112331 132131 "
+    "113123 113321 133121 313121 211331 231131 213113 213311 213131 311123 311321 331121 312113 312311 332111 "
+    "314111 221411 431111 111224 111422 121124 121421 141122 141221 112214 112412 122114 122411 142112 142211 "
+    "241211 221114 413111 241112 134111 111242 121142 121241 114212 124112 124211 411212 421112 421211 212141 "
+    "214121 412121 111143 111341 131141 114113 114311 411113 411311 113141 114131 311141 411131 211412 211214 "
+    "211232 2331112"
+).split()
+
+# Code sets: 0 = A (ASCII 0-95), 1 = B (ASCII 32-127), 2 = C (digit pairs)
+_CODE128_START = (103, 104, 105)
+_CODE128_SWITCH = (101, 100, 99)
+_CODE128_SHIFT = 98
+_CODE128_STOP = 106
+
+# Character classes driving the code set choice: digit, A only (control
+# characters), B only (lower case), or either of A and B
+_CODE128_CLASSES = str.maketrans({
+    chr(i): "d" if chr(i).isdigit() else "a" if i < 32 else "b" if i >= 96 else "x" for i in range(128)
+})
+
+
+@functools.lru_cache(maxsize=4096)
+def _code128_plan(classes: str) -> tuple:
+    """
+    Fewest-symbol encoding of a string of character classes.
+
+    Dynamic programming over (position, code set): A and B take one
+    character per symbol, or two symbols for a shifted character of the
+    other set; C takes a digit pair; switching sets costs one symbol. Codes
+    of the same shape (e.g. all random digits) share one cached plan.
+
+    Returns:
+        Tuple (start set, steps) where each step is ("switch", set),
+        ("char", set) or ("shift", set) for the next character, or ("pair",)
+        for the next two digits
+    """
+    n = len(classes)
+    infinity = n * 3 + 3
+    cost = [[infinity] * 3 for _ in range(n + 1)]
+    back = [[None] * 3 for _ in range(n + 1)]
+    cost[0] = [1, 1, 1]
+    for i in range(n + 1):
+        # Switching twice in a row never pays, so one relaxation is enough
+        row = list(cost[i])
+        for target in range(3):
+            for source in range(3):
+                if source != target and row[source] + 1 < cost[i][target]:
+                    cost[i][target] = row[source] + 1
+                    back[i][target] = (i, source, ("switch", target))
+        if i == n:
+            break
+        cls = classes[i]
+        for code_set in range(3):
+            here = cost[i][code_set]
+            if code_set == 2:
+                if cls == "d" and i + 1 < n and classes[i + 1] == "d" and here + 1 < cost[i + 2][2]:
+                    cost[i + 2][2] = here + 1
+                    back[i + 2][2] = (i, 2, ("pair",))
+                continue
+            other = 1 - code_set
+            if cls != "ab"[other]:
+                step, size = ("char", code_set), 1
+            else:
+                step, size = ("shift", other), 2
+            if here + size < cost[i + 1][code_set]:
+                cost[i + 1][code_set] = here + size
+                back[i + 1][code_set] = (i, code_set, step)
+
+    code_set = min(range(3), key=lambda s: cost[n][s])
+    steps = []
+    i = n
+    while back[i][code_set] is not None:
+        i, code_set, step = back[i][code_set]
+        steps.append(step)
+    return code_set, tuple(reversed(steps))
+
+
+def _code128_value(ch: str, code_set: int) -> int:
+    value = ord(ch)
+    return value + 64 if code_set == 0 and value < 32 else value - 32
+
+
+def code128_values(code: str) -> list:
+    """
+    Symbol values of code in Code128, using the fewest symbols.
+
+    Start code, code set switches and shifts are chosen by _code128_plan(),
+    so digit runs are packed two per symbol wherever that makes the barcode
+    narrower.
+
+    Returns:
+        Values from the start code up to and including the check symbol
+
+    Raises:
+        ValueError: If code is empty or has characters outside ASCII
+    """
+    if not code:
+        raise ValueError("empty code")
+    if not code.isascii():
+        bad = next(ch for ch in code if ord(ch) > 127)
+        raise ValueError(f"character {bad!r} cannot be encoded in Code128")
+
+    start, steps = _code128_plan(code.translate(_CODE128_CLASSES))
+    values = [_CODE128_START[start]]
+    i = 0
+    for step in steps:
+        if step[0] == "switch":
+            values.append(_CODE128_SWITCH[step[1]])
+        elif step[0] == "pair":
+            values.append(int(code[i:i + 2]))
+            i += 2
+        else:
+            if step[0] == "shift":
+                values.append(_CODE128_SHIFT)
+            values.append(_code128_value(code[i], step[1]))
+            i += 1
+    values.append((values[0] + sum(pos * value for pos, value in enumerate(values[1:], 1))) % 103)
+    return values
+
+
+def _pattern_bars(widths: str) -> tuple:
+    """(offset, width) of the bars of an alternating bar/space width pattern."""
+    offsets = [0]
+    for width in widths:
+        offsets.append(offsets[-1] + int(width))
+    return tuple((offsets[i], int(widths[i])) for i in range(0, len(widths), 2))
+
+
+_CODE128_BARS = tuple(_pattern_bars(widths) for widths in _CODE128_PATTERNS)
+
+
+def code128_bars(code: str) -> list:
+    """
+    Encode a code with Code128 and return its dark bars as module runs.
+
+    Args:
+        code: Barcode code string
+
+    Returns:
+        Tuple (bars, total_modules) where bars is a list of (start, width)
+        pairs measured in modules
+    """
+    values = code128_values(code)
+    values.append(_CODE128_STOP)
+    bars = [
+        (x + offset, width)
+        for x, value in zip(range(0, 11 * len(values), 11), values)
+        for offset, width in _CODE128_BARS[value]
+    ]
+    # Every symbol is 11 modules wide, the stop pattern 13
+    return bars, 11 * len(values) + 2
+
+
+def encode_code128(code: str) -> Symbol:
+    bars, total_modules = code128_bars(code)
+    return Symbol([(start, 0, width, 1) for start, width in bars], total_modules, 1, code, False)
+
+
+def _gs1_number(code: str, length: int, name: str) -> str:
+    """Complete a GS1 number given with or without its check digit, verifying it if present."""
+    if not (code.isascii() and code.isdigit()) or len(code) not in (length - 1, length):
+        raise ValueError(f"{name} needs {length - 1} digits ({length} with the check digit), got {code!r}")
+    check = check_character(code[:length - 1], "gs1")
+    if len(code) == length and code[-1] != check:
+        raise ValueError(f"Wrong {name} check digit in {code}: expected {check}")
+    return code[:length - 1] + check
+
+
+# EAN-13 digit patterns: L (odd parity), G (even parity) and R (right half)
+_EAN_L = ("0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011")
+_EAN_R = tuple(pattern.translate(str.maketrans("01", "10")) for pattern in _EAN_L)
+_EAN_G = tuple(pattern[::-1] for pattern in _EAN_R)
+# The first digit is not drawn; it selects the parity of the left half
+_EAN_PARITY = ("LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL")
+
+
+def encode_ean13(code: str) -> Symbol:
+    """EAN-13 from 12 digits (check digit added) or 13 digits (check digit verified)."""
+    digits = _gs1_number(code, 13, "EAN-13")
+    parity = _EAN_PARITY[int(digits[0])]
+    left = "".join((_EAN_L if side == "L" else _EAN_G)[int(d)] for side, d in zip(parity, digits[1:7]))
+    right = "".join(_EAN_R[int(d)] for d in digits[7:])
+    return _linear_symbol("101" + left + "01010" + right + "101", digits)
+
+
+# Width of wide elements in Code 39 and ITF, in narrow modules
+WIDE_MODULES = 3
+
+
+def _elements_pattern(elements: str) -> str:
+    """Module pattern of alternating bar/space elements, "n"arrow or "w"ide, starting with a bar."""
+    return "".join(
+        ("1" if i % 2 == 0 else "0") * (WIDE_MODULES if element == "w" else 1)
+        for i, element in enumerate(elements)
+    )
+
+
+# Interleaved 2 of 5 digit patterns
+_ITF_DIGITS = ("nnwwn", "wnnnw", "nwnnw", "wwnnn", "nnwnw", "wnwnn", "nwwnn", "nnnww", "wnnwn", "nwnwn")
+
+
+def encode_itf14(code: str) -> Symbol:
+    """ITF-14 from 13 digits (check digit added) or 14 digits (check digit verified)."""
+    digits = _gs1_number(code, 14, "ITF-14")
+    elements = ["nnnn"]
+    for bar_digit, space_digit in zip(digits[::2], digits[1::2]):
+        # The first digit of each pair is drawn in the bars, the second in the spaces
+        bars, spaces = _ITF_DIGITS[int(bar_digit)], _ITF_DIGITS[int(space_digit)]
+        elements.extend(bar + space for bar, space in zip(bars, spaces))
+    elements.append("wnn")
+    return _linear_symbol(_elements_pattern("".join(elements)), digits)
+
+
+# Code 39 characters as 5 bars and 4 spaces, 3 of them wide
+_CODE39 = {
+    "0": "nnnwwnwnn", "1": "wnnwnnnnw", "2": "nnwwnnnnw", "3": "wnwwnnnnn",
+    "4": "nnnwwnnnw", "5": "wnnwwnnnn", "6": "nnwwwnnnn", "7": "nnnwnnwnw",
+    "8": "wnnwnnwnn", "9": "nnwwnnwnn", "A": "wnnnnwnnw", "B": "nnwnnwnnw",
+    "C": "wnwnnwnnn", "D": "nnnnwwnnw", "E": "wnnnwwnnn", "F": "nnwnwwnnn",
+    "G": "nnnnnwwnw", "H": "wnnnnwwnn", "I": "nnwnnwwnn", "J": "nnnnwwwnn",
+    "K": "wnnnnnnww", "L": "nnwnnnnww", "M": "wnwnnnnwn", "N": "nnnnwnnww",
+    "O": "wnnnwnnwn", "P": "nnwnwnnwn", "Q": "nnnnnnwww", "R": "wnnnnnwwn",
+    "S": "nnwnnnwwn", "T": "nnnnwnwwn", "U": "wwnnnnnnw", "V": "nwwnnnnnw",
+    "W": "wwwnnnnnn", "X": "nwnnwnnnw", "Y": "wwnnwnnnn", "Z": "nwwnwnnnn",
+    "-": "nwnnnnwnw", ".": "wwnnnnwnn", " ": "nwwnnnwnn", "$": "nwnwnwnnn",
+    "/": "nwnwnnnwn", "+": "nwnnnwnwn", "%": "nnnwnwnwn", "*": "nwnnwnwnn",
+}
+
+
+def encode_code39(code: str) -> Symbol:
+    """Code 39 of digits, upper-case letters and "-. $/+%" (add a mod43 check character yourself)."""
+    if not code or any(ch not in MOD43_CHARSET for ch in code):
+        raise ValueError(f"Code 39 encodes digits, A-Z and '-. $/+%' only, got {code!r}")
+    # Characters are separated by one narrow space
+    elements = "n".join(_CODE39[ch] for ch in f"*{code}*")
+    return _linear_symbol(_elements_pattern(elements), code)
+
+
+def encode_qr(code: str) -> Symbol:
+    """QR code (error correction level M) using ReportLab's encoder."""
+    from reportlab.graphics.barcode import qrencoder
+
+    if not code:
+        raise ValueError("QR code needs a non-empty code")
+    qr = qrencoder.QRCode(None, qrencoder.QRErrorCorrectLevel.M)
+    qr.addData(code)
+    qr.make()
+    return _matrix_symbol(qr.modules, code, quiet=4)
+
+
+# Square ECC200 sizes: (symbol size, data region size, data codewords,
+# error correction codewords, interleaved blocks)
+_DATAMATRIX_SIZES = (
+    (10, 8, 3, 5, 1), (12, 10, 5, 7, 1), (14, 12, 8, 10, 1), (16, 14, 12, 12, 1),
+    (18, 16, 18, 14, 1), (20, 18, 22, 18, 1), (22, 20, 30, 20, 1), (24, 22, 36, 24, 1),
+    (26, 24, 44, 28, 1), (32, 14, 62, 36, 1), (36, 16, 86, 42, 1), (40, 18, 114, 48, 1),
+    (44, 20, 144, 56, 1), (48, 22, 174, 68, 1), (52, 24, 204, 84, 2), (64, 14, 280, 112, 2),
+    (72, 16, 368, 144, 4), (80, 18, 456, 192, 4), (88, 20, 576, 224, 4), (96, 22, 696, 272, 4),
+    (104, 24, 816, 336, 6), (120, 18, 1050, 408, 6), (132, 20, 1304, 496, 8), (144, 22, 1558, 620, 10),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _gf256_tables():
+    """Exponent and log tables of GF(256) with the ECC200 polynomial x^8+x^5+x^3+x^2+1."""
+    exp = [0] * 512
+    log = [0] * 256
+    value = 1
+    for i in range(255):
+        exp[i] = value
+        log[value] = i
+        value <<= 1
+        if value & 0x100:
+            value ^= 0x12D
+    exp[255:] = exp[:257]
+    return exp, log
+
+
+@functools.lru_cache(maxsize=None)
+def _reed_solomon_generator(degree: int) -> tuple:
+    """Coefficients (highest power first) of (x + a^1)(x + a^2)...(x + a^degree)."""
+    exp, log = _gf256_tables()
+    poly = [1]
+    for i in range(1, degree + 1):
+        product = poly + [0]
+        for j, coefficient in enumerate(poly):
+            if coefficient:
+                product[j + 1] ^= exp[log[coefficient] + i]
+        poly = product
+    return tuple(poly)
+
+
+def _reed_solomon(data: list, degree: int) -> list:
+    """Error correction codewords of data: the remainder of data * x^degree by the generator."""
+    exp, log = _gf256_tables()
+    generator = _reed_solomon_generator(degree)
+    remainder = [0] * degree
+    for codeword in data:
+        factor = codeword ^ remainder[0]
+        remainder = remainder[1:] + [0]
+        if factor:
+            for j in range(degree):
+                if generator[j + 1]:
+                    remainder[j] ^= exp[log[generator[j + 1]] + log[factor]]
+    return remainder
+
+
+def _datamatrix_codewords(data: bytes) -> list:
+    """ASCII encodation: digit pairs in one codeword, bytes above 127 with an upper shift."""
+    codewords = []
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if 48 <= byte <= 57 and i + 1 < len(data) and 48 <= data[i + 1] <= 57:
+            codewords.append(130 + (byte - 48) * 10 + data[i + 1] - 48)
+            i += 2
+            continue
+        if byte > 127:
+            codewords.extend((235, byte - 127))
+        else:
+            codewords.append(byte + 1)
+        i += 1
+    return codewords
+
+
+def _datamatrix_placement(size: int) -> list:
+    """
+    ECC200 module placement for a size x size mapping matrix.
+
+    Returns:
+        Matrix of (codeword index, bit index) per module, or True/False for
+        the fixed pattern some sizes leave in the bottom-right corner
+    """
+    grid = [[None] * size for _ in range(size)]
+
+    def module(row, col, codeword, bit):
+        if row < 0:
+            row += size
+            col += 4 - ((size + 4) % 8)
+        if col < 0:
+            col += size
+            row += 4 - ((size + 4) % 8)
+        grid[row][col] = (codeword, bit)
+
+    def utah(row, col, codeword):
+        for bit, (dr, dc) in enumerate(((-2, -2), (-2, -1), (-1, -2), (-1, -1), (-1, 0), (0, -2), (0, -1), (0, 0))):
+            module(row + dr, col + dc, codeword, bit)
+
+    def corner(codeword, positions):
+        for bit, (row, col) in enumerate(positions):
+            module(row, col, codeword, bit)
+
+    last = size - 1
+    corners = {
+        1: ((last, 0), (last, 1), (last, 2), (0, last - 1), (0, last), (1, last), (2, last), (3, last)),
+        2: ((last - 2, 0), (last - 1, 0), (last, 0), (0, last - 3), (0, last - 2), (0, last - 1), (0, last), (1, last)),
+        3: ((last - 2, 0), (last - 1, 0), (last, 0), (0, last - 1), (0, last), (1, last), (2, last), (3, last)),
+        4: ((last, 0), (last, last), (0, last - 2), (0, last - 1), (0, last), (1, last - 2), (1, last - 1), (1, last)),
+    }
+
+    codeword = 0
+    row, col = 4, 0
+    while row < size or col < size:
+        if row == size and col == 0:
+            corner(codeword, corners[1])
+            codeword += 1
+        if row == size - 2 and col == 0 and size % 4:
+            corner(codeword, corners[2])
+            codeword += 1
+        if row == size - 2 and col == 0 and size % 8 == 4:
+            corner(codeword, corners[3])
+            codeword += 1
+        if row == size + 4 and col == 2 and not size % 8:
+            corner(codeword, corners[4])
+            codeword += 1
+        # Sweep up and to the right...
+        while True:
+            if row < size and col >= 0 and grid[row][col] is None:
+                utah(row, col, codeword)
+                codeword += 1
+            row -= 2
+            col += 2
+            if not (row >= 0 and col < size):
+                break
+        row += 1
+        col += 3
+        # ...then down and to the left
+        while True:
+            if row >= 0 and col < size and grid[row][col] is None:
+                utah(row, col, codeword)
+                codeword += 1
+            row += 2
+            col -= 2
+            if not (row < size and col >= 0):
+                break
+        row += 3
+        col += 1
+
+    if grid[last][last] is None:
+        grid[last][last] = grid[last - 1][last - 1] = True
+        grid[last][last - 1] = grid[last - 1][last] = False
+    return grid
+
+
+def datamatrix_modules(code: str) -> list:
+    """Rows of dark (True) and light modules of the smallest square ECC200 symbol for code."""
+    try:
+        data = _datamatrix_codewords(code.encode("latin-1"))
+    except UnicodeEncodeError:
+        raise ValueError(f"DataMatrix encodes ISO 8859-1 text only, got {code!r}") from None
+    for size, region, data_count, ecc_count, blocks in _DATAMATRIX_SIZES:
+        if len(data) <= data_count:
+            break
+    else:
+        raise ValueError(f"Code is too long for a DataMatrix symbol ({len(data)} codewords)")
+
+    codewords = data[:]
+    if len(codewords) < data_count:
+        codewords.append(129)
+    while len(codewords) < data_count:
+        # Pad codewords are scrambled by their 1-based position
+        pad = 129 + (149 * (len(codewords) + 1)) % 253 + 1
+        codewords.append(pad if pad <= 254 else pad - 254)
+
+    # Large symbols interleave several Reed-Solomon blocks codeword by codeword
+    codewords += [0] * ecc_count
+    for block in range(blocks):
+        ecc = _reed_solomon(codewords[block:data_count:blocks], ecc_count // blocks)
+        for k, value in enumerate(ecc):
+            codewords[data_count + block + k * blocks] = value
+
+    regions = size // (region + 2)
+    placement = _datamatrix_placement(regions * region)
+    rows = []
+    for r in range(size):
+        region_row, y = divmod(r, region + 2)
+        row = []
+        for c in range(size):
+            region_col, x = divmod(c, region + 2)
+            if y == region + 1 or x == 0:
+                # Solid "L" finder along the left and bottom of each region
+                row.append(True)
+            elif y == 0:
+                # Alternating clock tracks along the top and right
+                row.append(x % 2 == 0)
+            elif x == region + 1:
+                row.append(y % 2 == 1)
+            else:
+                cell = placement[region_row * region + y - 1][region_col * region + x - 1]
+                if isinstance(cell, bool):
+                    row.append(cell)
+                else:
+                    index, bit = cell
+                    row.append(bool(codewords[index] >> (7 - bit) & 1))
+        rows.append(row)
+    return rows
+
+
+def encode_datamatrix(code: str) -> Symbol:
+    """Square DataMatrix (ECC200, ASCII encodation)."""
+    if not code:
+        raise ValueError("DataMatrix needs a non-empty code")
+    return _matrix_symbol(datamatrix_modules(code), code, quiet=1)
+
+
+# Encoders by symbology name; each maps a code to a Symbol or raises ValueError
+SYMBOLOGIES = {
+    "code128": encode_code128,
+    "ean13": encode_ean13,
+    "code39": encode_code39,
+    "itf14": encode_itf14,
+    "qr": encode_qr,
+    "datamatrix": encode_datamatrix,
+}
+
+
+def register_symbology(name: str, encoder):
+    """
+    Add or replace a symbology.
+
+    Process pool workers re-import modules, so register from module level
+    of an imported module rather than at run time.
+    """
+    SYMBOLOGIES[name] = encoder
+
+
+def encode_symbol(code: str, symbology: str = "code128") -> Symbol:
+    """Encode code with the named symbology."""
+    try:
+        encoder = SYMBOLOGIES[symbology]
+    except KeyError:
+        raise ValueError(f"Unknown symbology: {symbology}") from None
+    return encoder(code)